@@ -0,0 +1,42 @@
+"""articles import upsert keys
+
+Revision ID: 275f92ea883e
+Revises: a5c9b19f58a2
+Create Date: 2026-10-18 15:02:31.270458
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '275f92ea883e'
+down_revision: Union[str, None] = 'a5c9b19f58a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing duplicate source_url/slug values must be resolved before this
+    # revision can be applied.
+    op.create_index(
+        'ux_articles_source_url',
+        'articles',
+        ['source_url'],
+        unique=True,
+        postgresql_where=sa.text('source_url IS NOT NULL'),
+    )
+    op.create_index(
+        'ux_articles_slug',
+        'articles',
+        ['slug'],
+        unique=True,
+        postgresql_where=sa.text('slug IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_articles_slug', table_name='articles')
+    op.drop_index('ux_articles_source_url', table_name='articles')
@@ -0,0 +1,37 @@
+"""articles publishing indexes
+
+Revision ID: 3b8e51c0d7a4
+Revises: 275f92ea883e
+Create Date: 2026-10-18 16:10:12.804315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e51c0d7a4'
+down_revision: Union[str, None] = '275f92ea883e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_articles_published_created_at_id',
+        'articles',
+        ['created_at', 'id'],
+        postgresql_where=sa.text('published'),
+    )
+    op.create_index(
+        'ix_articles_published_scheduled_at',
+        'articles',
+        ['published', 'scheduled_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_published_scheduled_at', table_name='articles')
+    op.drop_index('ix_articles_published_created_at_id', table_name='articles')
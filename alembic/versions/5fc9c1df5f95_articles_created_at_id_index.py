@@ -0,0 +1,28 @@
+"""articles created_at id index
+
+Revision ID: 5fc9c1df5f95
+Revises: 90a64add1364
+Create Date: 2026-10-18 14:10:12.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5fc9c1df5f95'
+down_revision: Union[str, None] = '90a64add1364'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_articles_created_at_id', 'articles', ['created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_created_at_id', table_name='articles')
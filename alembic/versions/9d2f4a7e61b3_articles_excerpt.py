@@ -0,0 +1,28 @@
+"""articles excerpt
+
+Revision ID: 9d2f4a7e61b3
+Revises: 3b8e51c0d7a4
+Create Date: 2026-10-18 16:48:37.119842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f4a7e61b3'
+down_revision: Union[str, None] = '3b8e51c0d7a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get their excerpt (and corrected counts) from
+    # `python -m app.textstats` once this revision is applied.
+    op.add_column('articles', sa.Column('excerpt', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('articles', 'excerpt')
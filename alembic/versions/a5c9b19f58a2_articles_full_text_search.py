@@ -0,0 +1,61 @@
+"""articles full text search
+
+Revision ID: a5c9b19f58a2
+Revises: 5fc9c1df5f95
+Create Date: 2026-10-18 14:31:47.815520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c9b19f58a2'
+down_revision: Union[str, None] = '5fc9c1df5f95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.search.SEARCH_DOCUMENT at the time of this revision
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(keywords, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Adding a stored generated column rewrites the table once
+    op.add_column(
+        'articles',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_DOCUMENT, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        'ix_articles_search_vector',
+        'articles',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_articles_title_trgm',
+        'articles',
+        ['title'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_title_trgm', table_name='articles')
+    op.drop_index('ix_articles_search_vector', table_name='articles')
+    op.drop_column('articles', 'search_vector')
@@ -0,0 +1,26 @@
+"""articles category_id index
+
+Revision ID: c41a7d9e2f06
+Revises: 9d2f4a7e61b3
+Create Date: 2026-10-18 17:21:05.553170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a7d9e2f06'
+down_revision: Union[str, None] = '9d2f4a7e61b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_articles_category_id', 'articles', ['category_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_category_id', table_name='articles')
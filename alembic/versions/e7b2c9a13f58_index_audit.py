@@ -0,0 +1,45 @@
+"""index audit
+
+Revision ID: e7b2c9a13f58
+Revises: c41a7d9e2f06
+Create Date: 2026-10-18 17:52:44.061297
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2c9a13f58'
+down_revision: Union[str, None] = 'c41a7d9e2f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates of the primary keys
+    op.drop_index('ix_articles_id', table_name='articles')
+    op.drop_index('ix_categories_id', table_name='categories')
+    op.drop_index('ix_users_id', table_name='users')
+    # Nothing looks users up by bcrypt hash; the index only slowed writes
+    op.drop_index('ix_users_password', table_name='users')
+    # Superseded by ix_articles_published_created_at_id: every query ordered
+    # by (created_at, id) is restricted to published rows
+    op.drop_index('ix_articles_created_at_id', table_name='articles')
+
+    # Author pages (UserWithArticles) and the articles.author_id foreign key
+    op.create_index('ix_articles_author_id', 'articles', ['author_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_author_id', table_name='articles')
+
+    op.create_index(
+        'ix_articles_created_at_id', 'articles', ['created_at', 'id']
+    )
+    op.create_index('ix_users_password', 'users', ['password'], unique=False)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_index('ix_categories_id', 'categories', ['id'], unique=False)
+    op.create_index('ix_articles_id', 'articles', ['id'], unique=False)
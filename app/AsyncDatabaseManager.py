@@ -1,40 +1,232 @@
-import os
-from typing import List
+import re
+import time
+import weakref
+from datetime import datetime
+from typing import Optional
 
-from psycopg.rows import Row
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
 from psycopg_pool import AsyncConnectionPool
 
+from app import metrics
+from app.config import settings
+from app.database import connect_kwargs
+from app.search import SEARCH_CONFIG, prefix_tsquery
+
+# Article documents are assembled by Postgres itself so the hot read endpoints
+# can hand the bytes straight to the response without ORM hydration or
+# Pydantic re-serialization. Keep in sync with schema.Article. updated_at is
+# rendered with all six fractional digits (json_build_object drops trailing
+# zeros) because the routers parse it for validators; see parse_updated_at.
+_ARTICLE_JSON = """
+    json_build_object(
+        'title', a.title,
+        'content', a.content,
+        'published', a.published,
+        'id', a.id,
+        'category_id', a.category_id,
+        'author_id', a.author_id,
+        'number_of_words', a.number_of_words,
+        'minutes_to_read', a.minutes_to_read,
+        'excerpt', a.excerpt,
+        'image', a.image,
+        'slug', a.slug,
+        'keywords', a.keywords,
+        'scheduled_at', a.scheduled_at,
+        'source_url', a.source_url,
+        'fetch_timestamp', a.fetch_timestamp,
+        'view_count', a.view_count,
+        'shortened_link', a.shortened_link,
+        'created_at', a.created_at,
+        'updated_at', to_char(
+            a.updated_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'
+        ),
+        'author', json_build_object(
+            'email', u.email,
+            'id', u.id,
+            'username', u.username,
+            'is_active', u.is_active,
+            'created_at', u.created_at
+        )
+    )
+"""
+
+
+_FRACTION = re.compile(r"\.(\d{1,6})(?=[+-]|$)")
+
+
+class TimedConnectionPool(AsyncConnectionPool):
+    async def getconn(self, timeout: Optional[float] = None) -> AsyncConnection:
+        started_at = time.perf_counter()
+        try:
+            return await super().getconn(timeout)
+        finally:
+            metrics.db_pool_wait.observe(time.perf_counter() - started_at, "raw")
+
 
 class AsyncDatabaseManager:
     def __init__(self):
         self.pool: AsyncConnectionPool | bool = False
+        self._opened_at: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
     async def connect(self) -> None:
-        conn_str = self._get_conn_str()
-        self.pool = AsyncConnectionPool(conninfo=conn_str)
-        await self.pool.wait()
+        self.pool = TimedConnectionPool(
+            conninfo=self._get_conn_str(),
+            kwargs=connect_kwargs(),
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            timeout=settings.db_pool_timeout,
+            max_waiting=settings.db_pool_max_waiting,
+            max_idle=settings.db_pool_max_idle,
+            max_lifetime=settings.db_pool_max_lifetime,
+            check=AsyncConnectionPool.check_connection
+            if settings.db_pool_check
+            else None,
+            configure=self._configure,
+            open=False,
+        )
+        await self.pool.open(wait=True, timeout=settings.db_pool_timeout)
 
     async def disconnect(self) -> None:
-        await self.pool.close()
+        if self.pool:
+            await self.pool.close()
+        self.pool = False
 
-    async def get_articles(self) -> List[Row]:
+    @property
+    def connected(self) -> bool:
+        return bool(self.pool) and not self.pool.closed
+
+    async def get_articles_json(
+        self, skip: int = 0, limit: int = 100, search: str = ""
+    ) -> str:
+        tsquery = prefix_tsquery(search)
+        # Public lists only show published articles (partial index)
+        where = "WHERE a.published" + (
+            " AND a.search_vector @@ to_tsquery(%(config)s, %(tsquery)s)"
+            if tsquery
+            else ""
+        )
+
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(
+                f"""
+                SELECT coalesce(json_agg(page.doc), '[]'::json)::text
+                FROM (
+                    SELECT {_ARTICLE_JSON} AS doc
+                    FROM articles a JOIN users u ON u.id = a.author_id
+                    {where}
+                    ORDER BY a.created_at DESC, a.id DESC
+                    OFFSET %(skip)s LIMIT %(limit)s
+                ) page
+                """,
+                {
+                    "config": SEARCH_CONFIG,
+                    "tsquery": tsquery,
+                    "skip": skip,
+                    "limit": limit,
+                },
+            )
+            row = await cur.fetchone()
+
+            return row[0]
+
+    async def get_article_json(self, article_id: int) -> Optional[str]:
         async with self.pool.connection() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    """
-                    SELECT * FROM articles
+            cur = await conn.execute(
+                f"""
+                SELECT {_ARTICLE_JSON}::text
+                FROM articles a JOIN users u ON u.id = a.author_id
+                WHERE a.id = %(article_id)s
+                """,
+                {"article_id": article_id},
+            )
+            row = await cur.fetchone()
+
+            return row[0] if row else None
+
+    async def get_latest_article_json(self) -> Optional[str]:
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(
+                f"""
+                SELECT {_ARTICLE_JSON}::text
+                FROM articles a JOIN users u ON u.id = a.author_id
+                WHERE a.published
+                ORDER BY a.created_at DESC, a.id DESC
+                LIMIT 1
                 """
-                )
+            )
+            row = await cur.fetchone()
+
+            return row[0] if row else None
+
+    def stats(self) -> dict:
+        if not self.connected:
+            return {"connected": False}
+
+        stats = self.pool.get_stats()
+        now = time.monotonic()
+        ages = [now - opened_at for opened_at in self._opened_at.values()]
 
-                return await cur.fetchall()
+        return {
+            "connected": True,
+            "pool_min": stats.get("pool_min", 0),
+            "pool_max": stats.get("pool_max", 0),
+            "pool_size": stats.get("pool_size", 0),
+            "pool_available": stats.get("pool_available", 0),
+            "requests_waiting": stats.get("requests_waiting", 0),
+            "checkouts": stats.get("requests_num", 0),
+            "requests_wait_ms": stats.get("requests_wait_ms", 0),
+            "requests_errors": stats.get("requests_errors", 0),
+            "usage_ms": stats.get("usage_ms", 0),
+            "connections_num": stats.get("connections_num", 0),
+            "connections_lost": stats.get("connections_lost", 0),
+            "connection_age_min_s": round(min(ages), 3) if ages else 0,
+            "connection_age_max_s": round(max(ages), 3) if ages else 0,
+        }
+
+    async def _configure(self, conn: AsyncConnection) -> None:
+        self._opened_at[conn] = time.monotonic()
 
     def _get_conn_str(self) -> str:
-        dbname = os.getenv("POSTGRES_DB", "default_db_name")
-        user = os.getenv("POSTGRES_USER", "default_user")
-        password = os.getenv("POSTGRES_PASSWORD", "default_password")
-        host = os.getenv("POSTGRES_HOST", "localhost")
-        port = os.getenv("POSTGRES_PORT", "5432")
-
-        return (
-            f"dbname={dbname} user={user} password={password} host={host} port={port}"
+        return make_conninfo(
+            dbname=settings.db_db,
+            user=settings.db_user,
+            password=settings.db_password,
+            host=settings.db_host,
+            port=settings.db_port,
         )
+
+
+db_manager = AsyncDatabaseManager()
+
+
+def parse_updated_at(doc: dict) -> Optional[datetime]:
+    """
+    updated_at of a document built with _ARTICLE_JSON. fromisoformat before
+    Python 3.11 only accepts 3 or 6 fractional digits, so shorter fractions
+    (from documents rendered elsewhere) are padded first.
+    """
+    value = doc.get("updated_at")
+    if value is None:
+        return None
+
+    match = _FRACTION.search(value)
+    if match is not None:
+        value = (
+            value[: match.start(1)]
+            + match.group(1).ljust(6, "0")
+            + value[match.end(1) :]
+        )
+
+    return datetime.fromisoformat(value)
+
+
+def get_fast_reads() -> Optional[AsyncDatabaseManager]:
+    """
+    Dependency returning the pooled raw-SQL reader when the fast read path is
+    enabled, or None so the caller falls back to the ORM.
+    """
+    if settings.db_fast_read_path and db_manager.connected:
+        return db_manager
+
+    return None
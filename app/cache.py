@@ -0,0 +1,547 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+
+from app import compression
+from app.conditional import is_conditional, is_not_modified, not_modified_response
+from app.config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is only needed for the shared backend
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str = "application/json"
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Precompressed copies of body by content-coding ("gzip", "br")
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def to_response(self, status: str, encoding: Optional[str] = None) -> Response:
+        if encoding in self.encoded:
+            return Response(
+                content=self.encoded[encoding],
+                media_type=self.media_type,
+                headers={
+                    **compression.encoded_headers(self.headers, encoding),
+                    "X-Cache": status,
+                },
+            )
+
+        vary = {"Vary": "Accept-Encoding"} if self.encoded else {}
+        return Response(
+            content=self.body,
+            media_type=self.media_type,
+            headers={**self.headers, **vary, "X-Cache": status},
+        )
+
+
+class CacheBackend(ABC):
+    """
+    Storage for cached responses. Entries carry tags such as "article:42" or
+    "article:*" so writes can invalidate every entry built from an entity.
+    """
+
+    evictions: int = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: CachedResponse, tags: Iterable[str], ttl: int
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU with per-entry TTL. Each worker holds its own copy, so an
+    invalidation only reaches the worker that handled the write; other workers
+    converge within the TTL.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[
+            str, Tuple[float, CachedResponse, Tuple[str, ...]]
+        ] = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(
+        self, key: str, value: CachedResponse, tags: Iterable[str], ttl: int
+    ) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+
+        return removed
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared backend so every worker sees the same entries and invalidations.
+
+    Takes any client exposing the redis.asyncio API, which lets tests pass a
+    local stand-in instead of a real server.
+    """
+
+    def __init__(self, client, prefix: str = "cms:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        blob = await self.client.get(self.prefix + key)
+        if blob is None:
+            return None
+
+        header, _, data = blob.partition(b"\n")
+        meta = json.loads(header)
+
+        # The body is followed by its precompressed variants, back to back
+        offset = meta.get("body_length", len(data))
+        encoded = {}
+        for encoding, length in meta.get("encoded", {}).items():
+            encoded[encoding] = data[offset : offset + length]
+            offset += length
+
+        return CachedResponse(
+            body=data[: meta.get("body_length", len(data))],
+            media_type=meta["media_type"],
+            headers=meta["headers"],
+            encoded=encoded,
+        )
+
+    async def set(
+        self, key: str, value: CachedResponse, tags: Iterable[str], ttl: int
+    ) -> None:
+        header = json.dumps(
+            {
+                "media_type": value.media_type,
+                "headers": value.headers,
+                "body_length": len(value.body),
+                "encoded": {
+                    encoding: len(data) for encoding, data in value.encoded.items()
+                },
+            }
+        ).encode()
+        blob = b"".join([header, b"\n", value.body, *value.encoded.values()])
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + key, blob, ex=ttl)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                # Tag sets only need to outlive the entries they point at
+                pipe.expire(tag_key, ttl, gt=True)
+                pipe.expire(tag_key, ttl, nx=True)
+            await pipe.execute()
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self.client.smembers(tag_key)
+            if keys:
+                removed += await self.client.delete(
+                    *(self.prefix + k.decode() for k in keys)
+                )
+            await self.client.delete(tag_key)
+
+        return removed
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        # With read replicas, a miss right after a write can be refilled from
+        # a replica that has not replayed it yet; invalidating the same tags
+        # again once that much lag has passed drops such entries.
+        self.reinvalidate_after = 0.0
+        self._reinvalidations: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def respond(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Tuple[bytes, Iterable[str], Dict[str, str]]]],
+        ttl: Optional[int] = None,
+        request: Optional[Request] = None,
+        validator: Optional[Callable[[], Awaitable[Dict[str, str]]]] = None,
+    ) -> Response:
+        """
+        Serve key from the cache, or build it with loader and store it.
+
+        loader returns the JSON body, the tags it depends on and extra headers
+        (ETag, Last-Modified). Exceptions raised by the loader (e.g. a 404)
+        propagate and nothing is cached.
+
+        When request is given, conditional headers are honored with a 304. On
+        a cache miss, validator can supply the current ETag/Last-Modified from
+        a cheap lookup so a matching request never runs the loader.
+        """
+        conditional = request is not None and is_conditional(request)
+        encoding = (
+            compression.negotiate(request.headers.get("accept-encoding"))
+            if request is not None
+            else None
+        )
+
+        cached = await self.backend.get(key) if self.enabled else None
+        if cached is not None:
+            self.hits += 1
+            if conditional and is_not_modified(request, cached.headers):
+                return not_modified_response(cached.headers)
+
+            return cached.to_response("HIT", encoding)
+
+        if conditional and validator is not None:
+            headers = await validator()
+            if is_not_modified(request, headers):
+                return not_modified_response(headers)
+
+        body, tags, headers = await loader()
+        entry = CachedResponse(body=body, headers=headers)
+        if self.enabled:
+            self.misses += 1
+            # Compress once per entry rather than once per hit
+            entry.encoded = compression.encode_variants(body, entry.media_type)
+            await self.backend.set(key, entry, tags, ttl or self.ttl)
+
+        if conditional and is_not_modified(request, entry.headers):
+            return not_modified_response(entry.headers)
+
+        return entry.to_response("MISS", encoding)
+
+    async def invalidate(self, *tags: str) -> None:
+        if not self.enabled:
+            return
+
+        self.invalidations += await self.backend.invalidate_tags(tags)
+        if self.reinvalidate_after:
+            task = asyncio.create_task(self._reinvalidate(tags))
+            self._reinvalidations.add(task)
+            task.add_done_callback(self._reinvalidations.discard)
+
+    async def _reinvalidate(self, tags: Tuple[str, ...]) -> None:
+        await asyncio.sleep(self.reinvalidate_after)
+        try:
+            self.invalidations += await self.backend.invalidate_tags(tags)
+        except Exception:
+            logger.exception("Delayed invalidation of %s failed", ", ".join(tags))
+
+    async def clear(self) -> None:
+        if self.enabled:
+            await self.backend.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+            "entries": self.backend.size(),
+        }
+
+
+class PrincipalCache:
+    """
+    Bounded TTL map of verified access token -> authenticated principal, so
+    repeat requests with the same token skip both JWT decoding and the user
+    lookup. Entries never outlive the token's own expiry.
+
+    Entries are per worker. With a shared client (the redis one behind
+    CACHE_URL) invalidate_user also bumps a per-user epoch there, and a hit
+    only counts if the entry was cached under the current epoch, so a
+    deactivation reaches every worker at once. Without one, other workers
+    keep serving the old principal for up to ttl seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        max_entries: int,
+        enabled: bool = True,
+        client=None,
+        prefix: str = "cms:principal-epoch:",
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.client = client
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.revoked = 0
+        self._entries: OrderedDict[str, Tuple[float, Any, int]] = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+
+    async def epoch(self, user_id: int) -> Optional[int]:
+        """
+        The user's current shared epoch; None when it cannot be read, in
+        which case nothing may be served from or stored in the cache.
+        """
+        if self.client is None:
+            return 0
+
+        try:
+            value = await self.client.get(f"{self.prefix}{user_id}")
+        except Exception:
+            logger.exception("Reading the principal epoch of user %s failed", user_id)
+            return None
+
+        return int(value or 0)
+
+    async def get(self, token: str) -> Optional[Any]:
+        entry = self._entries.get(token) if self.enabled else None
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                self._remove(token)
+            self.misses += 1
+            return None
+
+        expires_at, principal, epoch = entry
+        if await self.epoch(principal.id) != epoch:
+            # Invalidated by another worker (or the epoch is unreadable)
+            if token in self._entries:
+                self._remove(token)
+            self.revoked += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+
+    def set(
+        self,
+        token: str,
+        principal: Any,
+        token_expires_at: float,
+        epoch: Optional[int] = 0,
+    ) -> None:
+        """
+        epoch must be read before the user lookup the principal came from,
+        so an invalidation racing with that lookup is not missed.
+        """
+        if not self.enabled or epoch is None:
+            return
+
+        if token in self._entries:
+            self._remove(token)
+
+        self._entries[token] = (
+            min(time.time() + self.ttl, token_expires_at),
+            principal,
+            epoch,
+        )
+        self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate_user(self, user_id: int) -> None:
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+        if self.client is not None:
+            # Never expires: an epoch that restarted from 0 could match
+            # entries cached before it did
+            await self.client.incr(f"{self.prefix}{user_id}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "shared_invalidation": self.client is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revoked": self.revoked,
+            "entries": len(self._entries),
+        }
+
+    def _remove(self, token: str) -> None:
+        _, principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+
+class SlugMap:
+    """
+    Bounded LRU of article slug -> id so slug lookups skip straight to the
+    primary key (and usually the cached article). Write paths in this worker
+    keep it current; entries expire after ttl so changes made by other
+    workers converge like MemoryBackend entries do.
+    """
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+        self._slugs_by_id: Dict[int, str] = {}
+
+    def get(self, slug: str) -> Optional[int]:
+        entry = self._entries.get(slug)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self.discard(slug)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(slug)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, slug: str, article_id: int) -> None:
+        # An article has one slug: drop its previous one, if any
+        self.forget(article_id)
+        self.discard(slug)
+
+        self._entries[slug] = (time.monotonic() + self.ttl, article_id)
+        self._slugs_by_id[article_id] = slug
+
+        while len(self._entries) > self.max_entries:
+            self.discard(next(iter(self._entries)))
+
+    def discard(self, slug: str) -> None:
+        entry = self._entries.pop(slug, None)
+        if entry is not None and self._slugs_by_id.get(entry[1]) == slug:
+            del self._slugs_by_id[entry[1]]
+
+    def forget(self, *article_ids: int) -> None:
+        for article_id in article_ids:
+            slug = self._slugs_by_id.pop(article_id, None)
+            if slug is not None:
+                self._entries.pop(slug, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._slugs_by_id.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+def _make_backend() -> CacheBackend:
+    if not settings.cache_url:
+        return MemoryBackend(max_entries=settings.cache_max_entries)
+
+    if redis is None:
+        raise RuntimeError("CACHE_URL is set but the redis package is not installed")
+
+    return RedisBackend(redis.from_url(settings.cache_url))
+
+
+response_cache = ResponseCache(
+    backend=_make_backend(), ttl=settings.cache_ttl, enabled=settings.cache_enabled
+)
+
+principal_cache = PrincipalCache(
+    ttl=settings.auth_cache_ttl,
+    max_entries=settings.auth_cache_max_entries,
+    enabled=settings.auth_cache_enabled,
+    client=(
+        response_cache.backend.client
+        if isinstance(response_cache.backend, RedisBackend)
+        else None
+    ),
+)
+
+
+slug_map = SlugMap(ttl=settings.cache_ttl, max_entries=settings.slug_map_max_entries)
+
+
+def article_tags(article_id: int, category_id: Optional[int], author_id: int):
+    return (f"article:{article_id}", f"category:{category_id}", f"user:{author_id}")
@@ -0,0 +1,224 @@
+import gzip
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Preferred first when the client weighs several encodings equally
+SUPPORTED_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best supported content-coding from an Accept-Encoding header,
+    honoring q-values. Returns None when the identity encoding should be sent.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+
+    return best
+
+
+def compressible(media_type: Optional[str], size: Optional[int] = None) -> bool:
+    if not settings.compression_enabled or not media_type:
+        return False
+    if size is not None and size < settings.compression_min_size:
+        return False
+
+    return media_type.split(";")[0].strip().lower() in settings.compression_types
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+def encode_variants(body: bytes, media_type: str) -> Dict[str, bytes]:
+    """
+    Every supported encoding of body, computed once so cached entries can be
+    served compressed without recompressing on each hit.
+    """
+    if not compressible(media_type, len(body)):
+        return {}
+
+    return {encoding: compress(body, encoding) for encoding in SUPPORTED_ENCODINGS}
+
+
+def encoded_headers(headers: Dict[str, str], encoding: str) -> Dict[str, str]:
+    # A compressed representation is not byte-identical to the original, so
+    # a strong ETag is weakened (as nginx does); revalidation still matches.
+    etag = headers.get("ETag")
+    return {
+        **headers,
+        **({"ETag": f"W/{etag}"} if etag and not etag.startswith("W/") else {}),
+        "Content-Encoding": encoding,
+        "Vary": "Accept-Encoding",
+    }
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(
+                quality=settings.compression_brotli_quality
+            )
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+            self.compress = self._compressor.process
+        else:
+            # wbits 16+ writes a gzip header and trailer
+            self._compressor = zlib.compressobj(
+                settings.compression_gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            self.compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def chunk(self, data: bytes, more: bool) -> bytes:
+        # Flush every chunk so streamed responses reach the client promptly
+        return self.compress(data) + (self._flush() if more else self._finish())
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses whose content type is allowlisted and whose body is
+    at least compression_min_size bytes, using the encoding the client prefers.
+    Responses that already carry a Content-Encoding (precompressed cache
+    entries) pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _Responder(send, encoding).send)
+
+
+class _Responder:
+    def __init__(self, send, encoding: str):
+        self._send = send
+        self.encoding = encoding
+        self.start: Optional[dict] = None
+        self.compressor: Optional[_StreamCompressor] = None
+        self.started = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the start until the first body chunk tells us its size
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.started:
+            if self.compressor is not None:
+                more = message.get("more_body", False)
+                message = {
+                    "type": "http.response.body",
+                    "body": self.compressor.chunk(message.get("body", b""), more),
+                    "more_body": more,
+                }
+            await self._send(message)
+            return
+
+        self.started = True
+        start = self.start
+        headers = _Headers(start.get("headers", []))
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if "content-encoding" in headers or not compressible(
+            headers.get("content-type"), None if more else len(body)
+        ):
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers.set("content-encoding", self.encoding)
+        headers.append("vary", "Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers.set("etag", f"W/{etag}")
+
+        if more:
+            self.compressor = _StreamCompressor(self.encoding)
+            headers.remove("content-length")
+            data = self.compressor.chunk(body, more=True)
+        else:
+            data = compress(body, self.encoding)
+            headers.set("content-length", str(len(data)))
+
+        await self._send({**start, "headers": headers.raw})
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more}
+        )
+
+
+class _Headers:
+    def __init__(self, raw: List[Tuple[bytes, bytes]]):
+        self.raw = list(raw)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str) -> Optional[str]:
+        key = name.encode()
+        for k, v in self.raw:
+            if k.lower() == key:
+                return v.decode("latin-1")
+        return None
+
+    def remove(self, name: str) -> None:
+        key = name.encode()
+        self.raw = [(k, v) for k, v in self.raw if k.lower() != key]
+
+    def set(self, name: str, value: str) -> None:
+        self.remove(name)
+        self.append(name, value)
+
+    def append(self, name: str, value: str) -> None:
+        self.raw.append((name.encode(), value.encode("latin-1")))
@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+
+def entity_etag(kind: str, entity_id: int, updated_at: Optional[datetime]) -> str:
+    """
+    Strong ETag for a single entity version, derived from its id and updated_at.
+    """
+    version = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+
+    return f'"{kind}-{entity_id}-{version}"'
+
+
+def digest_etag(parts: Iterable) -> str:
+    """
+    Strong ETag digesting a sequence of parts: member versions of a
+    collection, or simply the response body bytes.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\0")
+
+    return f'"{digest.hexdigest()}"'
+
+
+def validator_headers(
+    etag: str, last_modified: Optional[datetime] = None
+) -> Dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against a representation's
+    validators. If-None-Match takes precedence, as RFC 9110 requires.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("ETag")
+        if etag is None:
+            return False
+
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison is what GET revalidation uses
+        return "*" in candidates or any(
+            tag.removeprefix("W/") == etag for tag in candidates
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+            if_modified_since
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
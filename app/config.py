@@ -1,3 +1,5 @@
+from typing import List, Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +13,113 @@ class Settings(BaseSettings):
     algorithm: str
     access_token_expire_minutes: int
 
+    # psycopg_pool used by AsyncDatabaseManager for raw-SQL reads
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_max_waiting: int = 0
+    db_pool_max_idle: float = 600.0
+    db_pool_max_lifetime: float = 3600.0
+    db_pool_check: bool = True
+    db_fast_read_path: bool = False
+
+    # SQLAlchemy engine pool (and each replica's). Every gunicorn worker has
+    # its own pools: budget workers * (pool_size + max_overflow + db_pool_max_size)
+    # against max_connections.
+    db_engine_pool_size: int = 5
+    db_engine_max_overflow: int = 10
+    db_engine_pool_timeout: float = 30.0
+    db_engine_pool_recycle: int = 1800
+    db_engine_pool_pre_ping: bool = True
+    # Applied to every connection of both pools; None leaves the server default
+    db_statement_timeout_ms: Optional[int] = None
+    # psycopg prepares a statement server-side after this many executions;
+    # None never prepares
+    db_prepare_threshold: Optional[int] = 5
+    # Behind pgbouncer in transaction pooling mode: no prepared statements
+    # and no per-connection startup options
+    db_pgbouncer: bool = False
+
+    # Read replicas, as SQLAlchemy URLs like the primary's (postgresql+psycopg://...).
+    # GET handlers read from one that is at most db_replica_max_lag seconds
+    # behind, except for clients that wrote in the last read_your_writes_seconds.
+    db_replica_urls: List[str] = []
+    db_replica_max_lag: float = 5.0
+    db_replica_check_interval: float = 2.0
+    read_your_writes_seconds: float = 10.0
+
+    # Response cache for hot read endpoints; CACHE_URL selects a shared redis backend
+    cache_enabled: bool = True
+    cache_ttl: int = 60
+    cache_max_entries: int = 10_000
+    cache_url: Optional[str] = None
+    # GET /articles/by-slug: slug -> id entries kept per worker
+    slug_map_max_entries: int = 50_000
+
+    # Verified token -> principal cache used by oauth2.get_current_user. It is
+    # per worker: set CACHE_URL when running several, or a deactivated user
+    # stays authenticated on the other workers for up to auth_cache_ttl
+    auth_cache_enabled: bool = True
+    auth_cache_ttl: int = 60
+    auth_cache_max_entries: int = 10_000
+    # Put is_active in issued tokens and trust it instead of looking the user up.
+    # Deactivation then only takes effect once outstanding tokens expire.
+    jwt_embed_claims: bool = False
+
+    # Worker pool running bcrypt off the event loop ("thread" or "process")
+    hash_workers: int = 2
+    hash_max_waiting: int = 64
+    hash_executor: Literal["thread", "process"] = "thread"
+
+    # POST /articles/bulk
+    bulk_import_batch_size: int = 1000
+    # GET /articles/export: rows fetched per round trip from the server-side cursor
+    export_fetch_size: int = 2000
+
+    # Response compression (gzip, and brotli when the package is installed)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_types: List[str] = [
+        "application/json",
+        "application/x-ndjson",
+        "text/csv",
+        "text/plain",
+        "text/html",
+    ]
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Article views are counted in memory and flushed every this many seconds
+    view_count_enabled: bool = True
+    view_count_flush_interval: float = 5.0
+
+    # Scheduled publishing; disable the in-process worker when running
+    # `python -m app.scheduler` separately
+    scheduler_enabled: bool = True
+    scheduler_interval: float = 30.0
+    scheduler_batch_size: int = 500
+
+    # Request/DB metrics, exposed at GET /metrics
+    metrics_enabled: bool = True
+
+    # Users allowed on /admin/* (pool and cache internals, SQL and EXPLAIN
+    # plans with bound values), e.g. ADMIN_USER_IDS=[1]; nobody by default
+    admin_user_ids: List[int] = []
+
+    # Opt-in request profiling (see app.profiling): requests sent with
+    # `X-Profile: <profiling_token>` or picked at profiling_sample_rate
+    profiling_sample_rate: float = 0.0
+    profiling_token: Optional[str] = None
+    profiling_interval_ms: float = 5.0
+    profiling_buffer_size: int = 50
+    # Log ORM queries slower than this; capture EXPLAIN ANALYZE of SELECTs
+    # slower than slow_query_explain_ms
+    slow_query_ms: Optional[float] = None
+    slow_query_explain_ms: Optional[float] = None
+
+    # Development/CI: report ORM queries per request in X-DB-Query-Count
+    debug_query_count: bool = False
+
     class Config:
         env_file = ".env"
 
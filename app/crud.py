@@ -1,78 +1,396 @@
+from datetime import datetime, timezone
 from http import HTTPStatus
+from typing import Dict, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
-from app import models, schema, utils
+from sqlalchemy import and_, desc, select, delete, tuple_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schema, slugs, utils, search as text_search
+from app.cache import response_cache, principal_cache, slug_map
+from app.textstats import text_stats_async
+from app.loading import eager_options, projection_options
+
+
+def _article_query(response_model=schema.Article):
+    # Relationships refuse to lazy load, so fetch whatever the response
+    # model serializes (at least the author) up front.
+    return select(models.Article).options(
+        *eager_options(models.Article, response_model)
+    )
+
+
+def _published(query):
+    # Spelled exactly like the partial index predicate so the planner uses it
+    return query.filter(models.Article.published)
+
+
+def _search_filter(query, search: str):
+    tsquery = text_search.prefix_tsquery(search)
+    if not tsquery:
+        return query
+
+    return query.filter(
+        models.Article.search_vector.bool_op("@@")(
+            func.to_tsquery(text_search.SEARCH_CONFIG, tsquery)
+        )
+    )
+
+
+async def get_articles(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    search: str = "",
+    response_model=schema.Article,
+):
+    # Only select the columns the response needs; updated_at feeds the ETag
+    query = select(models.Article).options(
+        *projection_options(models.Article, response_model, always=("updated_at",))
+    )
+    result = await db.scalars(
+        _search_filter(_published(query), search)
+        .order_by(desc(models.Article.created_at), desc(models.Article.id))
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def search_articles(
+    db: AsyncSession, search: str, skip: int = 0, limit: int = 20
+):
+    tsquery = text_search.prefix_tsquery(search)
+    if tsquery:
+        hits = await _search_articles_fulltext(db, tsquery, skip, limit)
+        if hits or skip:
+            return hits
 
+    # Nothing to match as words (or no word matched): try a substring match
+    # on titles, served by the trigram index.
+    if len(search.strip()) < text_search.TRIGRAM_MIN_LENGTH:
+        return []
 
-def get_articles(db: Session, skip: int = 0, limit: int = 100, search: str = ""):
-    return (
-        db.query(models.Article)
-        .filter(models.Article.title.contains(search))
+    return await _search_articles_trigram(db, search.strip(), skip, limit)
+
+
+async def _search_articles_fulltext(
+    db: AsyncSession, tsquery: str, skip: int, limit: int
+):
+    query = func.to_tsquery(text_search.SEARCH_CONFIG, tsquery)
+    rank = func.ts_rank_cd(models.Article.search_vector, query)
+
+    # Rank and page over the index match first, so headlines are only
+    # generated for the rows actually returned.
+    page = (
+        select(models.Article.id, rank.label("rank"))
+        .filter(models.Article.published)
+        .filter(models.Article.search_vector.bool_op("@@")(query))
+        .order_by(desc("rank"), desc(models.Article.id))
         .offset(skip)
         .limit(limit)
-        .all()
+        .subquery()
+    )
+
+    result = await db.execute(
+        _article_query()
+        .add_columns(
+            page.c.rank,
+            func.ts_headline(
+                text_search.SEARCH_CONFIG,
+                models.Article.title,
+                query,
+                text_search.HEADLINE_OPTIONS,
+            ),
+            func.ts_headline(
+                text_search.SEARCH_CONFIG,
+                func.coalesce(models.Article.content, ""),
+                query,
+                text_search.HEADLINE_OPTIONS,
+            ),
+        )
+        .join(page, page.c.id == models.Article.id)
+        .order_by(desc(page.c.rank), desc(models.Article.id))
     )
 
+    return [
+        {
+            "article": article,
+            "rank": rank,
+            "title_highlight": title_highlight,
+            "content_highlight": content_highlight,
+        }
+        for article, rank, title_highlight, content_highlight in result.all()
+    ]
+
+
+async def _search_articles_trigram(
+    db: AsyncSession, search: str, skip: int, limit: int
+):
+    similarity = func.similarity(models.Article.title, search)
+
+    result = await db.execute(
+        _article_query()
+        .add_columns(similarity)
+        .filter(models.Article.published)
+        .filter(models.Article.title.icontains(search, autoescape=True))
+        .order_by(desc(similarity), desc(models.Article.id))
+        .offset(skip)
+        .limit(limit)
+    )
+
+    return [
+        {
+            "article": article,
+            "rank": rank,
+            "title_highlight": article.title,
+            "content_highlight": None,
+        }
+        for article, rank in result.all()
+    ]
+
+
+async def get_articles_after(
+    db: AsyncSession,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100,
+    search: str = "",
+    response_model=schema.Article,
+):
+    query = _search_filter(_published(_article_query(response_model)), search)
+
+    if after is not None:
+        query = query.filter(
+            tuple_(models.Article.created_at, models.Article.id) < tuple_(*after)
+        )
+
+    result = await db.scalars(
+        query.order_by(desc(models.Article.created_at), desc(models.Article.id)).limit(
+            limit
+        )
+    )
+    return result.all()
+
+
+async def get_most_viewed_articles(
+    db: AsyncSession, limit: int = 10, pending: Optional[Dict[int, int]] = None
+):
+    """
+    Top articles by view_count, with views not yet flushed (pending deltas)
+    added on top. Candidates are the stored top `limit` plus every article
+    with pending views, which is enough to get the combined top `limit` right.
+    """
+    pending = pending or {}
+    top = (
+        select(models.Article.id)
+        .filter(models.Article.published)
+        .order_by(desc(models.Article.view_count), desc(models.Article.id))
+        .limit(limit)
+    )
+
+    result = await db.scalars(
+        select(models.Article)
+        .options(*projection_options(models.Article, schema.ArticleViews))
+        .filter(models.Article.published)
+        .filter(
+            or_(
+                models.Article.id.in_(top.scalar_subquery()),
+                models.Article.id.in_(pending),
+            )
+        )
+    )
+
+    views = [
+        (article, (article.view_count or 0) + pending.get(article.id, 0))
+        for article in result.all()
+    ]
+    views.sort(key=lambda item: (item[1], item[0].id), reverse=True)
+
+    return [
+        schema.ArticleViews.model_validate(article).model_copy(
+            update={"view_count": view_count}
+        )
+        for article, view_count in views[:limit]
+    ]
+
+
+def _hold_until_scheduled(
+    data: dict, current_scheduled_at: Optional[datetime] = None
+) -> dict:
+    # An article scheduled for later stays unpublished until the publishing
+    # worker (app.scheduler) flips it at scheduled_at. Explicitly unpublishing
+    # one whose time has passed drops the schedule, or the worker would
+    # publish it right back. (app.importer applies the same rule in SQL.)
+    scheduled_at = data.get("scheduled_at", current_scheduled_at)
+    if scheduled_at is not None:
+        if scheduled_at.tzinfo is None:
+            scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+        if scheduled_at > datetime.now(timezone.utc):
+            data["published"] = False
+        elif data.get("published") is False:
+            data["scheduled_at"] = None
+
+    return data
+
+
+# Generated slugs retry if a concurrent write claims the same one first
+_SLUG_ATTEMPTS = 3
+
+
+def _slug_taken(error: IntegrityError) -> bool:
+    diag = getattr(error.orig, "diag", None)
+    return diag is not None and diag.constraint_name == "ux_articles_slug"
+
+
+def _raise_integrity_error(error: IntegrityError):
+    if _slug_taken(error):
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT, detail="Slug is already in use"
+        )
 
-def create_article(db: Session, article: schema.ArticleCreate):
-    db_article = models.Article(**article.dict())
+    raise error
 
-    db.add(db_article)
-    db.commit()
-    db.refresh(db_article)
-    return db_article
 
+async def create_article(db: AsyncSession, article: schema.ArticleCreate):
+    data = _hold_until_scheduled(article.model_dump())
+    stats = (await text_stats_async(article.content))._asdict()
+    generate_slug = data["slug"] is None
 
-def get_article(db: Session, article_id: int):
-    return db.query(models.Article).filter(models.Article.id == article_id).first()
+    for attempt in range(_SLUG_ATTEMPTS):
+        if generate_slug:
+            data["slug"] = await slugs.unique_slug(db, article.title)
+        db_article = models.Article(**data, **stats)
 
+        db.add(db_article)
+        try:
+            await db.commit()
+            break
+        except IntegrityError as e:
+            await db.rollback()
+            if not (generate_slug and _slug_taken(e)) or attempt == _SLUG_ATTEMPTS - 1:
+                _raise_integrity_error(e)
 
-def get_latest_article(db: Session):
-    return db.query(models.Article).order_by(desc(models.Article.created_at)).first()
+    slug_map.set(db_article.slug, db_article.id)
+    await response_cache.invalidate("article:*")
+    return await get_article(db, db_article.id)
 
 
-def update_article(
-    db: Session, article: models.Article, article_data: schema.ArticleUpdate
+async def get_article_id_by_slug(db: AsyncSession, slug: str) -> Optional[int]:
+    return await db.scalar(
+        select(models.Article.id).filter(models.Article.slug == slug)
+    )
+
+
+async def get_article(db: AsyncSession, article_id: int, response_model=schema.Article):
+    result = await db.scalars(
+        _article_query(response_model)
+        .filter(models.Article.id == article_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.first()
+
+
+async def get_article_version(db: AsyncSession, article_id: int):
+    # Validators only: lets conditional requests skip loading content
+    result = await db.execute(
+        select(models.Article.id, models.Article.updated_at).filter(
+            models.Article.id == article_id
+        )
+    )
+    return result.first()
+
+
+async def get_latest_article(db: AsyncSession, response_model=schema.Article):
+    result = await db.scalars(
+        _published(_article_query(response_model))
+        .order_by(desc(models.Article.created_at), desc(models.Article.id))
+        .limit(1)
+    )
+    return result.first()
+
+
+async def update_article(
+    db: AsyncSession, article: models.Article, article_data: schema.ArticleUpdate
 ):
-    update_data = article_data.dict(exclude_unset=True)
+    update_data = _hold_until_scheduled(
+        article_data.model_dump(exclude_unset=True), article.scheduled_at
+    )
+    # Only a content change can move the stats
+    if "content" in update_data:
+        update_data.update((await text_stats_async(update_data["content"]))._asdict())
+
+    # Slugs are stable once set, even if the title changes; articles created
+    # before slugs were generated get one now.
+    if update_data.get("slug", article.slug) is None:
+        update_data["slug"] = await slugs.unique_slug(
+            db, update_data.get("title", article.title), exclude_id=article.id
+        )
 
     for key, value in update_data.items():
         setattr(article, key, value)
+    article.updated_at = func.now()
 
-    db.commit()
-    db.refresh(article)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        _raise_integrity_error(e)
 
-    return article
+    if article.slug is not None:
+        slug_map.set(article.slug, article.id)
+    else:
+        slug_map.forget(article.id)
+    await response_cache.invalidate(f"article:{article.id}", "article:*")
+    return await get_article(db, article.id)
 
 
-def delete_article(db: Session, article_id: int):
-    article_query = db.query(models.Article).filter(models.Article.id == article_id)
-
-    article_query.delete()
-    db.commit()
+async def delete_article(db: AsyncSession, article_id: int):
+    await db.execute(delete(models.Article).where(models.Article.id == article_id))
+    await db.commit()
+    slug_map.forget(article_id)
+    await response_cache.invalidate(f"article:{article_id}", "article:*")
 
     return True
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.scalars(select(models.User).offset(skip).limit(limit))
+    return result.all()
 
 
-def create_user(db: Session, user: schema.UserCreate):
-    hashed_password = utils.hash_string(user.password)
+async def create_user(db: AsyncSession, user: schema.UserCreate):
+    hashed_password = await utils.hash_string_async(user.password)
     user.password = hashed_password
-    db_user = models.User(**user.dict())
+    db_user = models.User(**user.model_dump())
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def get_user(db: Session, user_id: int):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+async def update_user(db: AsyncSession, user_id: int, user_data: schema.UserUpdate):
+    db_user = await get_user(db, user_id)
+
+    update_data = user_data.model_dump(exclude_unset=True)
+
+    for key, value in update_data.items():
+        setattr(db_user, key, value)
+
+    await db.commit()
+    await db.refresh(db_user)
+    await principal_cache.invalidate_user(user_id)
+    await response_cache.invalidate(f"user:{user_id}")
+
+    return db_user
+
+
+async def get_user(db: AsyncSession, user_id: int, response_model=schema.User):
+    user = await db.scalar(
+        select(models.User)
+        .options(*eager_options(models.User, response_model))
+        .filter(models.User.id == user_id)
+    )
 
     if not user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="User not found!")
@@ -80,8 +398,8 @@ def get_user(db: Session, user_id: int):
     return user
 
 
-def get_user_by_email(db: Session, email: str):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    user = await db.scalar(select(models.User).filter(models.User.email == email))
 
     if not user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="User not found!")
@@ -89,8 +407,8 @@ def get_user_by_email(db: Session, email: str):
     return user
 
 
-def get_user_by_username(db: Session, username: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
+async def get_user_by_username(db: AsyncSession, username: str):
+    user = await db.scalar(select(models.User).filter(models.User.username == username))
 
     if not user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="User not found!")
@@ -98,22 +416,52 @@ def get_user_by_username(db: Session, username: str):
     return user
 
 
-def get_categories(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Category).offset(skip).limit(limit).all()
+async def get_categories(
+    db: AsyncSession, skip: int = 0, limit: int = 100, with_counts: bool = False
+):
+    page = (
+        select(models.Category).order_by(models.Category.id).offset(skip).limit(limit)
+    )
+    if not with_counts:
+        result = await db.scalars(page)
+        return result.all()
+
+    # Count published articles of the page's categories only, in one GROUP BY
+    # driven by ix_articles_category_id.
+    page = page.subquery()
+    result = await db.execute(
+        select(page.c.id, page.c.name, func.count(models.Article.id))
+        .outerjoin(
+            models.Article,
+            and_(models.Article.category_id == page.c.id, models.Article.published),
+        )
+        .group_by(page.c.id, page.c.name)
+        .order_by(page.c.id)
+    )
+
+    return [
+        {"id": category_id, "name": name, "article_count": article_count}
+        for category_id, name, article_count in result.all()
+    ]
 
 
-def create_category(db: Session, category: schema.CategoryCreate):
-    db_category = models.Category(**category.dict())
+async def create_category(db: AsyncSession, category: schema.CategoryCreate):
+    db_category = models.Category(**category.model_dump())
 
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    await response_cache.invalidate("category:*")
     return db_category
 
 
-def get_category(db: Session, category_id: int):
-    category = (
-        db.query(models.Category).filter(models.Category.id == category_id).first()
+async def get_category(
+    db: AsyncSession, category_id: int, response_model=schema.Category
+):
+    category = await db.scalar(
+        select(models.Category)
+        .options(*eager_options(models.Category, response_model))
+        .filter(models.Category.id == category_id)
     )
 
     if not category:
@@ -124,37 +472,43 @@ def get_category(db: Session, category_id: int):
     return category
 
 
-def update_category(
-    db: Session, category_id: int, category_data: schema.CategoryUpdate
+async def update_category(
+    db: AsyncSession, category_id: int, category_data: schema.CategoryUpdate
 ):
-    category_query = db.query(models.Article).filter(models.Category.id == category_id)
-    db_category = category_query.first()
+    db_category = await db.scalar(
+        select(models.Category).filter(models.Category.id == category_id)
+    )
 
     if not db_category:
         raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
+            status_code=HTTPStatus.NOT_FOUND, detail="Category not found"
         )
 
-    update_data = category_data.dict(exclude_unset=True)
+    update_data = category_data.model_dump(exclude_unset=True)
 
     for key, value in update_data.items():
         setattr(db_category, key, value)
 
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
+    await response_cache.invalidate(f"category:{category_id}", "category:*")
 
     return db_category
 
 
-def delete_category(db: Session, category_id: int):
-    category_query = db.query(models.Category).filter(models.Category.id == category_id)
+async def delete_category(db: AsyncSession, category_id: int):
+    category = await db.scalar(
+        select(models.Category).filter(models.Category.id == category_id)
+    )
 
-    if not category_query.first():
+    if not category:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="Category not found"
         )
 
-    category_query.delete()
-    db.commit()
+    await db.execute(delete(models.Category).where(models.Category.id == category_id))
+    await db.commit()
+    # Articles in the category had category_id set to NULL by the foreign key
+    await response_cache.invalidate(f"category:{category_id}", "category:*")
 
     return True
@@ -1,30 +1,87 @@
+import logging
 import os
+import time
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app import metrics
 from app.config import settings
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def get_db():
-    db = SessionLocal()
 
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def _get_conn_str() -> str:
     return f"postgresql+psycopg://{settings.db_user}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_db}"
 
 
+def connect_kwargs() -> dict:
+    """
+    psycopg connection arguments shared by the ORM engines and the raw pool.
+    """
+    kwargs = {
+        # Transaction pooling hands each transaction a different server
+        # connection, where a statement prepared on another one does not exist
+        "prepare_threshold": None
+        if settings.db_pgbouncer
+        else settings.db_prepare_threshold
+    }
+    # pgbouncer refuses the options startup parameter unless told to ignore
+    # it, so in that mode statement_timeout belongs on the role instead
+    if settings.db_statement_timeout_ms is not None and not settings.db_pgbouncer:
+        kwargs["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+
+    return kwargs
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that reports how long each checkout waited, including opening
+    a new connection when the pool had none idle.
+    """
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_wait.observe(time.perf_counter() - started_at, "orm")
+
+
+def make_engine(url: str):
+    return create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_engine_pool_size,
+        max_overflow=settings.db_engine_max_overflow,
+        pool_timeout=settings.db_engine_pool_timeout,
+        pool_recycle=settings.db_engine_pool_recycle,
+        pool_pre_ping=settings.db_engine_pool_pre_ping,
+        connect_args=connect_kwargs(),
+    )
+
+
+if settings.db_pgbouncer and settings.db_statement_timeout_ms is not None:
+    logger.warning(
+        "DB_STATEMENT_TIMEOUT_MS is not applied in pgbouncer mode; "
+        "use ALTER ROLE ... SET statement_timeout"
+    )
+
 SQLALCHEMY_DATABASE_URL = _get_conn_str()
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The psycopg (3) dialect picks its asyncio driver when used with create_async_engine
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from psycopg import sql
+
+from app.AsyncDatabaseManager import db_manager
+from app.config import settings
+
+EXPORT_COLUMNS = (
+    "id",
+    "title",
+    "content",
+    "published",
+    "category_id",
+    "author_id",
+    "number_of_words",
+    "minutes_to_read",
+    "excerpt",
+    "image",
+    "slug",
+    "keywords",
+    "scheduled_at",
+    "source_url",
+    "fetch_timestamp",
+    "view_count",
+    "shortened_link",
+    "created_at",
+    "updated_at",
+)
+
+# Flush NDJSON lines to the client in chunks of roughly this many bytes
+_CHUNK_BYTES = 64 * 1024
+
+
+class ArticleExport:
+    """
+    Streams the articles table out of Postgres without materializing it:
+    NDJSON through a server-side cursor, CSV through COPY TO STDOUT. Memory
+    use is bounded by the fetch size, not by the table size.
+
+    Unpublished articles are only exported to their author (visible_to).
+    """
+
+    def __init__(
+        self,
+        visible_to: int,
+        category_id: Optional[int] = None,
+        author_id: Optional[int] = None,
+        published: Optional[bool] = None,
+        updated_since: Optional[datetime] = None,
+    ):
+        filters: List[sql.Composable] = [
+            sql.SQL("(published OR author_id = {})").format(sql.Literal(visible_to))
+        ]
+        if category_id is not None:
+            filters.append(sql.SQL("category_id = {}").format(sql.Literal(category_id)))
+        if author_id is not None:
+            filters.append(sql.SQL("author_id = {}").format(sql.Literal(author_id)))
+        if published is not None:
+            filters.append(sql.SQL("published = {}").format(sql.Literal(published)))
+        if updated_since is not None:
+            filters.append(
+                sql.SQL("updated_at >= {}").format(sql.Literal(updated_since))
+            )
+
+        # Values are inlined as literals because COPY takes no parameters
+        self.where = sql.SQL("WHERE ") + sql.SQL(" AND ").join(filters)
+
+    async def ndjson(self) -> AsyncIterator[bytes]:
+        document = sql.SQL("json_build_object({})::text").format(
+            sql.SQL(", ").join(
+                sql.SQL("{}, {}").format(sql.Literal(column), sql.Identifier(column))
+                for column in EXPORT_COLUMNS
+            )
+        )
+        query = sql.SQL("SELECT {} FROM articles {} ORDER BY id").format(
+            document, self.where
+        )
+
+        async with db_manager.pool.connection() as conn:
+            async with conn.cursor(name="articles_export") as cur:
+                cur.itersize = settings.export_fetch_size
+                await cur.execute(query)
+
+                buffer: List[str] = []
+                size = 0
+                async for (line,) in cur:
+                    buffer.append(line)
+                    size += len(line) + 1
+                    if size >= _CHUNK_BYTES:
+                        yield ("\n".join(buffer) + "\n").encode()
+                        buffer, size = [], 0
+
+                if buffer:
+                    yield ("\n".join(buffer) + "\n").encode()
+
+    async def csv(self) -> AsyncIterator[bytes]:
+        query = sql.SQL(
+            "COPY (SELECT {} FROM articles {} ORDER BY id)"
+            " TO STDOUT WITH (FORMAT csv, HEADER true)"
+        ).format(sql.SQL(", ").join(map(sql.Identifier, EXPORT_COLUMNS)), self.where)
+
+        async with db_manager.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                async with cur.copy(query) as copy:
+                    async for data in copy:
+                        yield bytes(data)
@@ -0,0 +1,354 @@
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+from psycopg import AsyncConnection, AsyncCursor, errors, sql
+from pydantic import ValidationError
+
+from app import schema, slugs
+from app.AsyncDatabaseManager import db_manager
+from app.cache import response_cache, slug_map
+from app.textstats import text_stats_async
+
+# Columns an import sets. view_count is only written for new rows and
+# author_id is never changed on existing ones. The text stats are computed
+# here, not taken from the document.
+IMPORT_COLUMNS = (
+    "title",
+    "content",
+    "published",
+    "category_id",
+    "author_id",
+    "number_of_words",
+    "minutes_to_read",
+    "excerpt",
+    "image",
+    "slug",
+    "keywords",
+    "scheduled_at",
+    "source_url",
+    "fetch_timestamp",
+    "view_count",
+    "shortened_link",
+)
+UPDATE_COLUMNS = tuple(
+    column for column in IMPORT_COLUMNS if column not in ("author_id", "view_count")
+)
+
+# Rows are upserted on source_url when present, otherwise on slug; rows with
+# neither are plain inserts. Each conflict target is backed by a partial
+# unique index (see models.Article).
+_UPSERT_KEYS = {
+    "source_url": "source_url IS NOT NULL",
+    "slug": "source_url IS NULL AND slug IS NOT NULL",
+}
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """
+    Yield one decoded document per NDJSON line without buffering the body.
+    Undecodable lines are yielded as the exception so the row still gets a result.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _decode(line)
+
+    if buffer.strip():
+        yield _decode(buffer)
+
+
+def _decode(line: bytes):
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError as e:
+        return e
+
+
+class ArticleImporter:
+    """
+    Validates incoming article documents in batches and streams each batch
+    into a temporary table with COPY. Every batch is then upserted into
+    articles with a few set-based statements and committed on its own.
+    """
+
+    def __init__(self, author_id: int, batch_size: int):
+        self.author_id = author_id
+        self.batch_size = batch_size
+        self.results: List[schema.BulkImportRowResult] = []
+        self._touched_ids: List[int] = []
+
+    async def run(self, documents: AsyncIterator[object]) -> schema.BulkImportResult:
+        batch: List[Tuple[int, object]] = []
+        index = 0
+        async for document in documents:
+            batch.append((index, document))
+            index += 1
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch)
+                batch = []
+
+        if batch:
+            await self._import_batch(batch)
+
+        if self._touched_ids:
+            # Upserts may have moved slugs between articles
+            slug_map.forget(*self._touched_ids)
+            await response_cache.invalidate(
+                "article:*",
+                *(f"article:{article_id}" for article_id in self._touched_ids),
+            )
+
+        self.results.sort(key=lambda result: result.index)
+        counts = {"created": 0, "updated": 0}
+        for result in self.results:
+            if result.status in counts:
+                counts[result.status] += 1
+
+        return schema.BulkImportResult(
+            created=counts["created"],
+            updated=counts["updated"],
+            failed=len(self.results) - counts["created"] - counts["updated"],
+            results=self.results,
+        )
+
+    async def _import_batch(self, batch: List[Tuple[int, object]]) -> None:
+        rows: Dict[int, schema.ArticleCreate] = {}
+        last_by_key: Dict[Tuple[str, str], int] = {}
+
+        for index, document in batch:
+            try:
+                if isinstance(document, Exception):
+                    raise ValueError(f"Invalid JSON: {document}")
+                if not isinstance(document, dict):
+                    raise ValueError("Expected a JSON object")
+                article = schema.ArticleCreate.model_validate(
+                    {**document, "author_id": self.author_id}
+                )
+            except ValidationError as e:
+                self._result(index, "invalid", errors=_validation_messages(e))
+                continue
+            except ValueError as e:
+                self._result(index, "invalid", errors=[str(e)])
+                continue
+
+            # Within a batch the last document for a key wins
+            key = _upsert_key(article)
+            if key is not None:
+                previous = last_by_key.get(key)
+                if previous is not None:
+                    del rows[previous]
+                    self._result(
+                        previous, "duplicate", errors=[f"Superseded by row {index}"]
+                    )
+                last_by_key[key] = index
+            rows[index] = article
+
+        if not rows:
+            return
+
+        async with db_manager.pool.connection() as conn:
+            try:
+                async with conn.transaction():
+                    outcome = await self._upsert(conn, rows)
+            except (errors.IntegrityError, errors.DataError):
+                # Some row violates a constraint the upsert does not arbitrate
+                # (e.g. a slug owned by another source_url, an unknown
+                # category). Isolate the offending rows one at a time.
+                outcome = {}
+                for index, article in rows.items():
+                    try:
+                        async with conn.transaction():
+                            outcome.update(await self._upsert(conn, {index: article}))
+                    except (errors.IntegrityError, errors.DataError) as e:
+                        self._result(
+                            index, "failed", errors=[e.diag.message_primary or str(e)]
+                        )
+
+        for index, (status, article_id) in outcome.items():
+            self._result(index, status, article_id=article_id)
+            if article_id is not None:
+                self._touched_ids.append(article_id)
+
+    async def _upsert(
+        self, conn: AsyncConnection, rows: Dict[int, schema.ArticleCreate]
+    ) -> Dict[int, Tuple[str, Optional[int]]]:
+        cur = conn.cursor()
+        # The copied id default draws from the articles sequence, so every
+        # staged row already knows the id it will be inserted with.
+        await cur.execute(
+            "CREATE TEMP TABLE articles_import (LIKE articles INCLUDING DEFAULTS)"
+            " ON COMMIT DROP"
+        )
+        await cur.execute("ALTER TABLE articles_import ADD COLUMN row_no integer")
+        columns = sql.SQL(", ").join(map(sql.Identifier, IMPORT_COLUMNS))
+        async with cur.copy(
+            sql.SQL("COPY articles_import (row_no, {}) FROM STDIN").format(columns)
+        ) as copy:
+            for index, article in rows.items():
+                stats = await text_stats_async(article.content)
+                data = {**article.model_dump(), **stats._asdict()}
+                await copy.write_row((index, *(data[c] for c in IMPORT_COLUMNS)))
+
+        # Same rule as crud._hold_until_scheduled: future schedules stay
+        # unpublished, and unpublished rows whose time has passed are drafts
+        # the publishing worker must not pick up
+        await cur.execute(
+            """
+            UPDATE articles_import
+            SET published = CASE WHEN scheduled_at > now() THEN false
+                                 ELSE published END,
+                scheduled_at = CASE WHEN NOT published AND scheduled_at <= now()
+                                    THEN NULL ELSE scheduled_at END
+            WHERE scheduled_at IS NOT NULL
+            """
+        )
+
+        outcome: Dict[int, Tuple[str, Optional[int]]] = {}
+
+        # Plain inserts keep their staged ids, so they map back to input rows
+        await cur.execute(
+            sql.SQL(
+                """
+                INSERT INTO articles (id, {columns})
+                SELECT id, {columns} FROM articles_import
+                WHERE source_url IS NULL AND slug IS NULL
+                """
+            ).format(columns=columns)
+        )
+        await cur.execute(
+            "SELECT row_no, id FROM articles_import"
+            " WHERE source_url IS NULL AND slug IS NULL"
+        )
+        for row_no, article_id in await cur.fetchall():
+            outcome[row_no] = ("created", article_id)
+
+        # An update keeps the article's current upsert keys when the row has
+        # none: a slug-keyed row always has a NULL source_url, and wiping it
+        # would let a later source_url import duplicate the article
+        updates = sql.SQL(", ").join(
+            sql.SQL(
+                "{0} = coalesce(EXCLUDED.{0}, articles.{0})"
+                if column in _UPSERT_KEYS
+                else "{0} = EXCLUDED.{0}"
+            ).format(sql.Identifier(column))
+            for column in UPDATE_COLUMNS
+        )
+        for key, predicate in _UPSERT_KEYS.items():
+            await cur.execute(
+                sql.SQL(
+                    """
+                    INSERT INTO articles (id, {columns})
+                    SELECT id, {columns} FROM articles_import WHERE {predicate}
+                    ON CONFLICT ({key}) WHERE {key} IS NOT NULL DO UPDATE
+                    SET {updates}, updated_at = now()
+                    WHERE articles.author_id = EXCLUDED.author_id
+                    RETURNING id, {key}, xmax = 0
+                    """
+                ).format(
+                    columns=columns,
+                    predicate=sql.SQL(predicate),
+                    key=sql.Identifier(key),
+                    updates=updates,
+                )
+            )
+            written = {
+                value: (article_id, inserted)
+                for article_id, value, inserted in await cur.fetchall()
+            }
+
+            await cur.execute(
+                sql.SQL(
+                    "SELECT row_no, {key} FROM articles_import WHERE {predicate}"
+                ).format(key=sql.Identifier(key), predicate=sql.SQL(predicate))
+            )
+            for row_no, value in await cur.fetchall():
+                if value in written:
+                    article_id, inserted = written[value]
+                    outcome[row_no] = ("created" if inserted else "updated", article_id)
+                else:
+                    # The conflicting article belongs to another author
+                    outcome[row_no] = ("forbidden", None)
+
+        await _assign_slugs(
+            cur, [article_id for _, article_id in outcome.values() if article_id]
+        )
+
+        return outcome
+
+    def _result(
+        self,
+        index: int,
+        status: str,
+        article_id: Optional[int] = None,
+        errors: Optional[List[str]] = None,
+    ) -> None:
+        self.results.append(
+            schema.BulkImportRowResult(
+                index=index, status=status, id=article_id, errors=errors
+            )
+        )
+
+
+async def _assign_slugs(cur: AsyncCursor, article_ids: List[int]) -> None:
+    """
+    Give the written articles that have no slug one, as crud.create_article
+    does: slugify(title), suffixed with -2, -3, ... when taken. The candidates
+    of the whole batch are checked in one equality lookup on ux_articles_slug.
+    """
+    await cur.execute(
+        "SELECT id, title FROM articles WHERE id = ANY(%s) AND slug IS NULL"
+        " ORDER BY id",
+        (article_ids,),
+    )
+    bases = {
+        article_id: slugs.slugify(title) for article_id, title in await cur.fetchall()
+    }
+    if not bases:
+        return
+
+    candidates = {
+        base: slugs.slug_candidates(base, count)
+        for base, count in Counter(bases.values()).items()
+    }
+    await cur.execute(
+        "SELECT slug FROM articles WHERE slug = ANY(%s)",
+        ([slug for group in candidates.values() for slug in group],),
+    )
+    taken = {slug for (slug,) in await cur.fetchall()}
+
+    assigned: Dict[int, str] = {}
+    for article_id, base in bases.items():
+        free = [slug for slug in candidates[base] if slug not in taken]
+        assigned[article_id] = (
+            free[0] if free else slugs.random_slug(candidates[base][0])
+        )
+        taken.add(assigned[article_id])
+
+    await cur.execute(
+        """
+        UPDATE articles AS a SET slug = v.slug
+        FROM unnest(%s::integer[], %s::text[]) AS v (id, slug)
+        WHERE a.id = v.id
+        """,
+        (list(assigned), list(assigned.values())),
+    )
+
+
+def _upsert_key(article: schema.ArticleCreate) -> Optional[Tuple[str, str]]:
+    if article.source_url is not None:
+        return ("source_url", article.source_url)
+    if article.slug is not None:
+        return ("slug", article.slug)
+
+    return None
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    ]
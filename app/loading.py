@@ -0,0 +1,96 @@
+import typing
+from functools import lru_cache
+from typing import Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.interfaces import ONETOMANY, MANYTOMANY
+
+from app.serialization import MODEL_CACHE_SIZE
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def eager_options(model: type, response_model: Type[BaseModel]) -> tuple:
+    """
+    Loader options that fetch every relationship response_model serializes.
+
+    Each field of the response model that names a relationship of the mapped
+    class is loaded eagerly, recursing into nested models: collections with
+    selectinload (one extra query per relationship, whatever the page size)
+    and many-to-one with joinedload (folded into the main query). Nothing is
+    ever left to lazy loading, which relationships are configured to refuse.
+    """
+    return tuple(_options_for(model, response_model, parent=None))
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def projection_options(
+    model: type, response_model: Type[BaseModel], always: Tuple[str, ...] = ()
+) -> tuple:
+    """
+    eager_options plus a load_only restricting the SELECT to the columns
+    response_model serializes (and those named in `always`, e.g. the ones an
+    ETag is computed from). The primary key is always loaded.
+    """
+    columns = inspect(model).column_attrs.keys()
+    names = [
+        name
+        for name in columns
+        if name in response_model.model_fields or name in always
+    ]
+
+    return (
+        load_only(*(getattr(model, name) for name in names)),
+        *eager_options(model, response_model),
+    )
+
+
+def _options_for(model: type, response_model: Type[BaseModel], parent):
+    relationships = inspect(model).relationships
+
+    for name, field in response_model.model_fields.items():
+        relationship = relationships.get(name)
+        if relationship is None:
+            continue
+
+        attribute = getattr(model, name)
+        if relationship.direction in (ONETOMANY, MANYTOMANY):
+            loader = (
+                selectinload(attribute)
+                if parent is None
+                else parent.selectinload(attribute)
+            )
+        else:
+            loader = (
+                joinedload(attribute)
+                if parent is None
+                else parent.joinedload(attribute)
+            )
+
+        nested = _nested_model(field.annotation)
+        nested_options = (
+            list(_options_for(relationship.mapper.class_, nested, parent=loader))
+            if nested is not None
+            else []
+        )
+
+        # Chained options already include their parent path
+        if nested_options:
+            yield from nested_options
+        else:
+            yield loader
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    # Unwrap Optional[...] / List[...] down to the nested pydantic model
+    while typing.get_origin(annotation) is not None:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if not args:
+            return None
+        annotation = args[0]
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+
+    return None
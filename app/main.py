@@ -1,19 +1,51 @@
 #!/usr/bin/env python3.10
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import article, user, auth, category
+from app import metrics, profiling, querycount
+from app.compression import CompressionMiddleware
+from app.AsyncDatabaseManager import db_manager
+from app.cache import response_cache
+from app.config import settings
+from app.database import engine
+from app.replicas import ReadYourWritesMiddleware, replica_set
+from app.routers import article, user, auth, category, admin
+from app.scheduler import publish_scheduler
+from app.utils import hash_pool
+from app.viewcount import view_counter
 
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await db_manager.connect()
+    replica_set.start()
+    view_counter.start()
+    publish_scheduler.start()
+    yield
+    await publish_scheduler.stop()
+    await view_counter.stop()
+    await db_manager.disconnect()
+    await replica_set.stop()
+    await engine.dispose()
+    hash_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost",
     "http://localhost:8000",
 ]
 
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -22,11 +54,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if replica_set.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
+    response_cache.reinvalidate_after = replica_set.max_lag + replica_set.check_interval
+
+if settings.debug_query_count:
+    querycount.install(engine)
+    app.add_middleware(querycount.QueryCountMiddleware)
+
+if profiling.profiler.profiling_enabled or profiling.profiler.slow_query_log_enabled:
+    profiling.install(engine)
+if profiling.profiler.profiling_enabled:
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# Outermost, so latency includes every other middleware
+if settings.metrics_enabled:
+    metrics.install(engine)
+    metrics.register_runtime_metrics()
+    app.add_middleware(metrics.MetricsMiddleware)
+
 
 app.include_router(auth.router)
 app.include_router(article.router)
 app.include_router(user.router)
 app.include_router(category.router)
+app.include_router(admin.router)
 
 
 # Routes
@@ -35,6 +87,14 @@ async def root():
     return {"Hello World!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    # Unauthenticated for scrapers; restrict access at the proxy
+    return Response(
+        content=metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
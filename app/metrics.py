@@ -0,0 +1,366 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Each worker process keeps its own registry; scrape every worker (or run one
+worker per scrape target) and aggregate in Prometheus.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+POOL_WAIT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0,
+)  # fmt: skip
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type: str = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: per-bucket (non-cumulative) counts, sum, count
+        self.series: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}"
+            )
+            lines.append(
+                f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+            )
+
+        return lines
+
+
+class Collected(Metric):
+    """
+    Metric read at scrape time from a callback returning {label values: value},
+    for state other components already track (pool sizes, cache counters).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], Dict[LabelValues, float]],
+        labels: Sequence[str] = (),
+        type: str = "gauge",
+    ):
+        super().__init__(name, help, labels)
+        self.collect = collect
+        self.type = type
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in self.collect().items()
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter(
+        "http_requests_total",
+        "Requests handled, by route template and status",
+        ["method", "route", "status"],
+    )
+)
+http_latency = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from request start to the last response byte, by route template",
+        ["method", "route"],
+    )
+)
+http_db_queries = registry.register(
+    Histogram(
+        "http_request_db_queries",
+        "ORM queries issued per request, by route template",
+        ["method", "route"],
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+http_db_time = registry.register(
+    Histogram(
+        "http_request_db_seconds",
+        "Time spent executing ORM queries per request, by route template",
+        ["method", "route"],
+    )
+)
+db_pool_wait = registry.register(
+    Histogram(
+        "db_pool_wait_seconds",
+        "Time to check a connection out of a pool (orm: SQLAlchemy, raw: psycopg)",
+        ["pool"],
+        buckets=POOL_WAIT_BUCKETS,
+    )
+)
+db_query_duration = registry.register(
+    Histogram("db_query_duration_seconds", "Execution time of individual ORM queries")
+)
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[_RequestStats]] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+def install(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstall(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# The start time lives on the execution context, which is dropped with the
+# statement: kept on the connection, a statement that raises would leave it
+# behind for the next query to pop
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_metrics_started_at", None)
+    if started_at is None:
+        return
+
+    elapsed = time.perf_counter() - started_at
+    db_query_duration.observe(elapsed)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def collected(
+    name: str,
+    help: str,
+    collect: Callable[[], Dict[LabelValues, float]],
+    labels: Iterable[str] = (),
+    type: str = "gauge",
+) -> None:
+    registry.register(Collected(name, help, collect, tuple(labels), type))
+
+
+def register_runtime_metrics() -> None:
+    # Imported here: these modules import settings-dependent singletons
+    from app.AsyncDatabaseManager import db_manager
+    from app.cache import principal_cache, response_cache
+    from app.database import engine
+    from app.replicas import replica_set
+    from app.utils import hash_pool
+    from app.viewcount import view_counter
+
+    def pool_connections():
+        pool = engine.sync_engine.pool
+        values = {
+            ("orm", "checked_out"): pool.checkedout(),
+            ("orm", "idle"): pool.checkedin(),
+            ("orm", "overflow"): max(pool.overflow(), 0),
+        }
+        raw = db_manager.stats()
+        if raw["connected"]:
+            values[("raw", "checked_out")] = raw["pool_size"] - raw["pool_available"]
+            values[("raw", "idle")] = raw["pool_available"]
+            values[("raw", "waiting")] = raw["requests_waiting"]
+
+        return values
+
+    collected(
+        "db_pool_connections",
+        "Connections per pool and state (waiting: requests queued for one)",
+        pool_connections,
+        ["pool", "state"],
+    )
+    collected(
+        "db_replica_lag_seconds",
+        "Replication lag at the last check; absent while a replica is unreachable",
+        lambda: {
+            (replica.name,): replica.lag
+            for replica in replica_set.replicas
+            if replica.lag is not None
+        },
+        ["replica"],
+    )
+    collected(
+        "cache_requests_total",
+        "Cache lookups by cache and result",
+        lambda: {
+            ("response", "hit"): response_cache.hits,
+            ("response", "miss"): response_cache.misses,
+            ("principal", "hit"): principal_cache.hits,
+            ("principal", "miss"): principal_cache.misses,
+        },
+        ["cache", "result"],
+        type="counter",
+    )
+    collected(
+        "password_hash_operations",
+        "Password hashing jobs by state",
+        lambda: {
+            ("waiting",): hash_pool.waiting,
+            ("in_flight",): hash_pool.in_flight,
+        },
+        ["state"],
+    )
+    collected(
+        "article_views_pending",
+        "Article views recorded but not yet flushed",
+        lambda: {(): sum(view_counter.pending.values())},
+    )
+
+
+class MetricsMiddleware:
+    """
+    Records count, latency and ORM query stats per route template (e.g.
+    "/articles/{article_id}", never the raw path, to keep label cardinality
+    bounded). Requests that match no route are grouped as "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+
+            http_requests.inc(*labels, str(status))
+            http_latency.observe(time.perf_counter() - started_at, *labels)
+            http_db_queries.observe(stats.queries, *labels)
+            http_db_time.observe(stats.db_seconds, *labels)
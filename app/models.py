@@ -5,19 +5,23 @@ from sqlalchemy import (
     String,
     Text,
     Boolean,
+    Computed,
     ForeignKey,
+    Index,
     text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import expression
 
 from app.database import Base
+from app.search import SEARCH_DOCUMENT
 
 
 class Article(Base):
     __tablename__ = "articles"
 
-    id = Column(Integer, index=True, primary_key=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     content = Column(Text)
     published = Column(Boolean, nullable=False, default=True)
@@ -29,6 +33,8 @@ class Article(Base):
     )
     number_of_words = Column(Integer, nullable=False, default=0)
     minutes_to_read = Column(Integer, nullable=False, default=0)
+    # Plain-text lead of content; maintained with the counts above (textstats)
+    excerpt = Column(String, nullable=True)
     image = Column(String, nullable=True)
     slug = Column(String, nullable=True)
     keywords = Column(String, nullable=True)
@@ -39,31 +45,75 @@ class Article(Base):
     view_count = Column(Integer, nullable=False, default=0)
     shortened_link = Column(String, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
-    updated_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    updated_at = Column(
+        TIMESTAMP(timezone=True), server_default=text("now()"), onupdate=text("now()")
+    )
+    # Maintained by Postgres; deferred so regular article loads never fetch it
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(SEARCH_DOCUMENT, persisted=True))
+    )
 
-    author = relationship("User", back_populates="articles")
-    category = relationship("Category", back_populates="articles")
+    author = relationship("User", back_populates="articles", lazy="raise")
+    category = relationship("Category", back_populates="articles", lazy="raise")
+
+    __table_args__ = (
+        # Backs the public lists and keyset pagination ordered by
+        # (created_at, id), which only ever read published rows
+        Index(
+            "ix_articles_published_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("published"),
+        ),
+        Index("ix_articles_author_id", "author_id"),
+        # Category pages and counts; also keeps ON DELETE SET NULL from
+        # scanning the table when a category is deleted
+        Index("ix_articles_category_id", "category_id"),
+        # Due-article scan of the publishing scheduler
+        Index("ix_articles_published_scheduled_at", "published", "scheduled_at"),
+        Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        # Upsert targets for bulk imports
+        Index(
+            "ux_articles_source_url",
+            "source_url",
+            unique=True,
+            postgresql_where=text("source_url IS NOT NULL"),
+        ),
+        Index(
+            "ux_articles_slug",
+            "slug",
+            unique=True,
+            postgresql_where=text("slug IS NOT NULL"),
+        ),
+        # Substring fallback for queries full-text search cannot match
+        Index(
+            "ix_articles_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+    )
 
 
 class Category(Base):
     __tablename__ = "categories"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
 
-    articles = relationship("Article", back_populates="category")
+    articles = relationship("Article", back_populates="category", lazy="raise")
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String, nullable=True, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
-    password = Column(String, nullable=False, index=True)
+    password = Column(String, nullable=False)
     is_active = Column(Boolean, server_default=expression.true())
     created_at = Column(
         TIMESTAMP(timezone=True), server_default=expression.text("now()")
     )
 
-    articles = relationship("Article", back_populates="author")
+    articles = relationship("Article", back_populates="author", lazy="raise")
@@ -5,13 +5,14 @@ from typing import Annotated
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from app import crud
+from app import crud, models
+from app.cache import principal_cache
 from app.config import settings
 from app.database import get_db
-from app.schema import TokenData
+from app.schema import TokenData, Principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -32,26 +33,62 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+def token_claims(user: models.User) -> dict:
+    claims = {"user_id": user.id}
+    if settings.jwt_embed_claims:
+        claims["is_active"] = bool(user.is_active)
+
+    return claims
+
+
 async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)
-):
+    token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_db)
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    principal = await principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
 
         if user_id is None:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
+        token_data = TokenData(user_id=user_id, is_active=payload.get("is_active"))
     except JWTError:
         raise credentials_exception
 
-    user = crud.get_user(db=db, user_id=token_data.user_id)
-    if user is None:
+    # Read before the lookup, see PrincipalCache.set
+    epoch = await principal_cache.epoch(token_data.user_id)
+    if settings.jwt_embed_claims and token_data.is_active is not None:
+        principal = Principal(id=token_data.user_id, is_active=token_data.is_active)
+    else:
+        try:
+            user = await crud.get_user(db=db, user_id=token_data.user_id)
+        except HTTPException:
+            raise credentials_exception
+        principal = Principal(id=user.id, is_active=bool(user.is_active))
+
+    if not principal.is_active:
         raise credentials_exception
 
-    return user
+    principal_cache.set(token, principal, token_expires_at=payload["exp"], epoch=epoch)
+
+    return principal
+
+
+async def get_admin_user(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    if current_user.id not in settings.admin_user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+    return current_user
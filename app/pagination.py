@@ -0,0 +1,26 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, article_id: int) -> str:
+    """
+    Build an opaque cursor pointing just past the given (created_at, id) key.
+    """
+    raw = json.dumps([created_at.isoformat(), article_id], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Inverse of encode_cursor. Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, article_id = json.loads(base64.urlsafe_b64decode(padded))
+
+        return datetime.fromisoformat(created_at), int(article_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,353 @@
+"""
+Opt-in request profiling and slow-query logging.
+
+A request is profiled when it carries `X-Profile: <PROFILING_TOKEN>` or is
+picked by PROFILING_SAMPLE_RATE. Its ORM statements are timed and a sampler
+thread records the stacks of the request's task every
+PROFILING_INTERVAL_MS. Finished profiles are kept in a bounded ring buffer
+(GET /admin/profiles) and their id is returned in X-Profile-Id.
+
+Independently, ORM queries slower than SLOW_QUERY_MS are logged, and SELECTs
+slower than SLOW_QUERY_EXPLAIN_MS get an EXPLAIN ANALYZE plan captured in
+the background on the raw pool (GET /admin/slow-queries).
+"""
+import asyncio
+import itertools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.AsyncDatabaseManager import db_manager
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per profile; the total count is always kept
+MAX_QUERIES = 200
+MAX_STACKS = 50
+MAX_STATEMENT_LENGTH = 2000
+# The same statement is explained at most once per this many seconds
+EXPLAIN_INTERVAL = 60.0
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples the event loop thread's stack while the profiled task is the one
+    running on it, so other requests interleaved on the same loop are not
+    attributed to it. Work the task hands to the threadpool (sync
+    dependencies, bcrypt) is not seen. The GIL switch interval (5ms by
+    default) bounds how often the sampler actually gets to run.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.loop = task.get_loop()
+        self.task = task
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if asyncio.current_task(self.loop) is not self.task:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and not frame.f_code.co_filename.startswith(
+                _ASYNCIO_DIR
+            ):
+                stack.append(
+                    f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+                )
+                frame = frame.f_back
+            # The request has finished once stop() was called
+            if stack and not self._stopped.is_set():
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        # Not joined: this runs on the event loop, and the thread exits by
+        # itself within one interval
+        self._stopped.set()
+
+
+class Profile:
+    def __init__(self, profile_id: int, scope: dict, interval: float):
+        self.id = profile_id
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.started_at = time.time()
+        self.status = 500
+        self.duration_ms = 0.0
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.queries: List[dict] = []
+        self.sampler = _StackSampler(asyncio.current_task(), interval)
+
+    def record_query(self, statement: str, elapsed: float) -> None:
+        self.query_count += 1
+        self.db_ms += elapsed * 1000
+        if len(self.queries) < MAX_QUERIES:
+            self.queries.append(
+                {
+                    "statement": statement[:MAX_STATEMENT_LENGTH],
+                    "duration_ms": round(elapsed * 1000, 3),
+                }
+            )
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "db_ms": round(self.db_ms, 3),
+            "query_count": self.query_count,
+            "samples": self.sampler.samples,
+        }
+
+    def as_dict(self) -> dict:
+        # Collapsed "root;...;leaf count" stacks, as flame graph tools read them
+        stacks = [
+            {"stack": stack, "samples": samples}
+            for stack, samples in self.sampler.stacks.most_common(MAX_STACKS)
+        ]
+        return {
+            **self.summary(),
+            "sample_interval_ms": self.sampler.interval * 1000,
+            "queries": self.queries,
+            "stacks": stacks,
+        }
+
+
+_current: ContextVar[Optional[Profile]] = ContextVar("profile", default=None)
+
+
+class Profiler:
+    def __init__(
+        self,
+        sample_rate: float,
+        token: Optional[str],
+        interval_ms: float,
+        buffer_size: int,
+        slow_query_ms: Optional[float],
+        explain_ms: Optional[float],
+    ):
+        self.sample_rate = sample_rate
+        self.token = token.encode() if token else None
+        self.interval = interval_ms / 1000
+        self.slow_query_ms = slow_query_ms
+        self.explain_ms = explain_ms
+        self.profiles: Deque[Profile] = deque(maxlen=buffer_size)
+        self.slow_queries: Deque[dict] = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._explained: Dict[str, float] = {}
+        self._explain_tasks: Set[asyncio.Task] = set()
+        self.profiled = 0
+        self.explains = 0
+        self.failed_explains = 0
+
+    @property
+    def profiling_enabled(self) -> bool:
+        return self.sample_rate > 0 or self.token is not None
+
+    @property
+    def slow_query_log_enabled(self) -> bool:
+        return self.slow_query_ms is not None or self.explain_ms is not None
+
+    def wants(self, scope: dict) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return value == self.token
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, scope: dict) -> Profile:
+        profile = Profile(next(self._ids), scope, self.interval)
+        profile.sampler.start()
+        return profile
+
+    def finish(self, profile: Profile) -> None:
+        profile.sampler.stop()
+        self.profiles.append(profile)
+        self.profiled += 1
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+
+        return None
+
+    def query_finished(self, statement: str, parameters, elapsed: float) -> None:
+        profile = _current.get()
+        if profile is not None:
+            profile.record_query(statement, elapsed)
+
+        elapsed_ms = elapsed * 1000
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement[:500])
+
+        if self.explain_ms is not None and elapsed_ms >= self.explain_ms:
+            self._explain_later(statement, parameters, elapsed_ms)
+
+    def _explain_later(self, statement: str, parameters, elapsed_ms: float) -> None:
+        # EXPLAIN ANALYZE runs the query again: SELECTs only, never ones that
+        # lock rows, one at a time and rate limited per statement
+        # (the read-only transaction in _explain backs this up)
+        if (
+            not statement.lstrip()[:6].upper().startswith(("SELECT", "WITH"))
+            or "FOR UPDATE" in statement.upper()
+            or not isinstance(parameters, (dict, tuple))
+            or self._explain_tasks
+            or not db_manager.connected
+        ):
+            return
+
+        now = time.monotonic()
+        if now - self._explained.get(statement, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+            return
+        if len(self._explained) > 1000:
+            self._explained.clear()
+        self._explained[statement] = now
+
+        entry = {
+            "at": time.time(),
+            "duration_ms": round(elapsed_ms, 3),
+            "statement": statement[:MAX_STATEMENT_LENGTH],
+            "plan": None,
+        }
+        self.slow_queries.append(entry)
+
+        task = asyncio.get_running_loop().create_task(
+            self._explain(entry, statement, parameters, elapsed_ms)
+        )
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(
+        self, entry: dict, statement: str, parameters, elapsed_ms: float
+    ) -> None:
+        try:
+            async with db_manager.pool.connection() as conn:
+                async with conn.transaction(force_rollback=True):
+                    await conn.execute("SET TRANSACTION READ ONLY")
+                    # Generous, but stops a plan capture from piling onto a
+                    # database that is already struggling
+                    await conn.execute(
+                        f"SET LOCAL statement_timeout = {int(elapsed_ms * 3) + 1000}"
+                    )
+                    cur = await conn.execute(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                    )
+                    plan = "\n".join(row[0] for row in await cur.fetchall())
+        except Exception:
+            self.failed_explains += 1
+            logger.exception("EXPLAIN ANALYZE of a slow query failed")
+            return
+
+        self.explains += 1
+        entry["plan"] = plan
+        logger.warning(
+            "Plan of slow query (%.1f ms): %s\n%s", elapsed_ms, statement[:500], plan
+        )
+
+    def stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "header_enabled": self.token is not None,
+            "interval_ms": self.interval * 1000,
+            "slow_query_ms": self.slow_query_ms,
+            "explain_ms": self.explain_ms,
+            "profiled": self.profiled,
+            "buffered_profiles": len(self.profiles),
+            "buffered_slow_queries": len(self.slow_queries),
+            "explains": self.explains,
+            "failed_explains": self.failed_explains,
+        }
+
+
+profiler = Profiler(
+    sample_rate=settings.profiling_sample_rate,
+    token=settings.profiling_token,
+    interval_ms=settings.profiling_interval_ms,
+    buffer_size=settings.profiling_buffer_size,
+    slow_query_ms=settings.slow_query_ms,
+    explain_ms=settings.slow_query_explain_ms,
+)
+
+
+def install(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstall(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# On the execution context, like app.metrics, so a failing statement leaves
+# nothing behind on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profile_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_profile_started_at", None)
+    if started_at is None:
+        return
+
+    elapsed = time.perf_counter() - started_at
+    profiler.query_finished(statement, None if executemany else parameters, elapsed)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.start(scope)
+        token = _current.set(profile)
+        started_at = time.perf_counter()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", str(profile.id).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.duration_ms = (time.perf_counter() - started_at) * 1000
+            _current.reset(token)
+            profiler.finish(profile)
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+        self.parameters: List[Any] = []
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Count the SQL statements the ORM engine executes inside the block, e.g.
+    to assert that an endpoint's query count does not grow with page size.
+    Counting follows the current asyncio task, so concurrent requests do not
+    see each other's queries.
+    """
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+def install(engine: AsyncEngine) -> None:
+    if not event.contains(
+        engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(
+            engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+        counter.parameters.append(parameters)
+
+
+class QueryCountMiddleware:
+    """
+    Adds an X-DB-Query-Count header with the number of ORM queries a request
+    ran. Meant for development and CI, enabled by DEBUG_QUERY_COUNT.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"],
+                        (b"x-db-query-count", str(counter.count).encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
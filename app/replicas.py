@@ -0,0 +1,260 @@
+"""
+Read-replica routing for the ORM.
+
+GET handlers take their session from get_read_db, which hands out a session
+on a healthy replica unless the client wrote recently (read-your-writes) or
+no replica is within DB_REPLICA_MAX_LAG seconds; then it falls back to the
+primary. Writes always use get_db.
+
+After a successful mutation ReadYourWritesMiddleware sets a short-lived
+cookie, and returns the same deadline in X-Read-Primary-Until for clients
+that do not keep cookies (they send it back as a request header).
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import SessionLocal, make_engine
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_PRIMARY_HEADER = "x-read-primary-until"
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Seconds the replica is behind: 0 when it has replayed everything it
+# received, so an idle primary does not look like replication lag. A server
+# that is not in recovery (e.g. a plain second Postgres in tests) reports 0.
+# A replica whose WAL receiver is not streaming has also replayed all it
+# received, but that says nothing about the primary: it reports NULL and is
+# taken out of rotation. Without pg_read_all_stats the status column reads
+# NULL, and only a running WAL receiver is required.
+_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE coalesce(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine: AsyncEngine = make_engine(url)
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self.name = f"{self.engine.url.host}:{self.engine.url.port or 5432}"
+        # Unhealthy until the first lag check has passed
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.reads = 0
+        self.failed_checks = 0
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag: float,
+        check_interval: float,
+        read_your_writes: float,
+    ):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.read_your_writes = read_your_writes
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self.fallback_reads = 0
+        self.read_your_writes_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="replica-lag-check")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def check(self) -> None:
+        # Concurrently, so one unreachable replica does not hold up the others
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            # The timeout covers connecting too: an unreachable host would
+            # otherwise hang in connect() for the OS TCP timeout
+            lag = await asyncio.wait_for(
+                self._lag(replica), timeout=self.check_interval
+            )
+            if lag is None:
+                raise RuntimeError("WAL receiver is not streaming")
+        except Exception:
+            if replica.healthy:
+                logger.exception("Replica %s failed its lag check", replica.name)
+            replica.healthy = False
+            replica.lag = None
+            replica.failed_checks += 1
+            return
+
+        replica.lag = float(lag)
+        healthy = replica.lag <= self.max_lag
+        if healthy != replica.healthy:
+            logger.warning(
+                "Replica %s is %s (lag %.1fs)",
+                replica.name,
+                "back in rotation" if healthy else "lagging, reading from primary",
+                replica.lag,
+            )
+        replica.healthy = healthy
+
+    @staticmethod
+    async def _lag(replica: Replica) -> Optional[float]:
+        async with replica.engine.connect() as conn:
+            return await conn.scalar(_LAG_QUERY)
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+
+        return healthy[next(self._next) % len(healthy)]
+
+    def wants_primary(self, request: Request) -> bool:
+        if request.method not in _SAFE_METHODS:
+            return True
+
+        deadline = request.cookies.get(READ_PRIMARY_COOKIE) or request.headers.get(
+            READ_PRIMARY_HEADER
+        )
+        if deadline is None:
+            return False
+        try:
+            deadline = float(deadline)
+        except ValueError:
+            return False
+
+        # Client supplied: a deadline further out than one window cannot
+        # have come from us, and would pin the client to the primary for good
+        now = time.time()
+        return now < deadline <= now + self.read_your_writes
+
+    def sessionmaker_for(self, request: Request) -> async_sessionmaker:
+        if not self.enabled:
+            return SessionLocal
+
+        if self.wants_primary(request):
+            self.read_your_writes_reads += 1
+            return SessionLocal
+
+        replica = self.pick()
+        if replica is None:
+            self.fallback_reads += 1
+            return SessionLocal
+
+        replica.reads += 1
+        return replica.sessionmaker
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_lag": self.max_lag,
+            "check_interval": self.check_interval,
+            "read_your_writes": self.read_your_writes,
+            "fallback_reads": self.fallback_reads,
+            "read_your_writes_reads": self.read_your_writes_reads,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag": replica.lag,
+                    "reads": replica.reads,
+                    "failed_checks": replica.failed_checks,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+
+replica_set = ReplicaSet(
+    urls=settings.db_replica_urls,
+    max_lag=settings.db_replica_max_lag,
+    check_interval=settings.db_replica_check_interval,
+    read_your_writes=settings.read_your_writes_seconds,
+)
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only handlers: a replica when one is healthy and the
+    client has not written recently, otherwise the primary.
+    """
+    async with replica_set.sessionmaker_for(request)() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pins a client's reads to the primary for read_your_writes seconds after
+    a successful mutation, so it sees its own writes despite replica lag.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = replica_set.read_your_writes
+                deadline = f"{time.time() + window:.3f}"
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={deadline}; Max-Age={int(window) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"set-cookie", cookie.encode()),
+                    (READ_PRIMARY_HEADER.encode(), deadline.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
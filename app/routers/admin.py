@@ -0,0 +1,171 @@
+from http import HTTPStatus
+
+from fastapi import Depends, APIRouter, HTTPException
+
+from app import oauth2, schema
+from app.AsyncDatabaseManager import db_manager
+from app.cache import response_cache, principal_cache, slug_map
+from app.profiling import profiler
+from app.replicas import replica_set
+from app.scheduler import publish_scheduler
+from app.utils import hash_pool
+from app.viewcount import view_counter
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/pool", status_code=HTTPStatus.OK)
+async def get_pool_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get runtime statistics of the raw-SQL connection pool
+
+    :param current_user:
+    :return:
+    """
+    return db_manager.stats()
+
+
+@router.get("/cache", status_code=HTTPStatus.OK)
+async def get_cache_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get hit, miss and eviction counters of the response cache
+
+    :param current_user:
+    :return:
+    """
+    return response_cache.stats()
+
+
+@router.get("/auth-cache", status_code=HTTPStatus.OK)
+async def get_auth_cache_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get counters of the verified token -> principal cache
+
+    :param current_user:
+    :return:
+    """
+    return principal_cache.stats()
+
+
+@router.get("/slug-map", status_code=HTTPStatus.OK)
+async def get_slug_map_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get counters of the article slug -> id map
+
+    :param current_user:
+    :return:
+    """
+    return slug_map.stats()
+
+
+@router.get("/replicas", status_code=HTTPStatus.OK)
+async def get_replica_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get lag, health and read counters of the read replicas
+
+    :param current_user:
+    :return:
+    """
+    return replica_set.stats()
+
+
+@router.get("/hashing", status_code=HTTPStatus.OK)
+async def get_hashing_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get queueing metrics of the password hashing worker pool
+
+    :param current_user:
+    :return:
+    """
+    return hash_pool.stats()
+
+
+@router.get("/views", status_code=HTTPStatus.OK)
+async def get_view_count_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get pending and flushed counters of the article view aggregator
+
+    :param current_user:
+    :return:
+    """
+    return view_counter.stats()
+
+
+@router.get("/scheduler", status_code=HTTPStatus.OK)
+async def get_scheduler_stats(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get run counters of the scheduled publishing worker
+
+    :param current_user:
+    :return:
+    """
+    return publish_scheduler.stats()
+
+
+@router.get("/profiles", status_code=HTTPStatus.OK)
+async def get_profiles(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get profiler settings and summaries of the buffered request profiles,
+    newest first
+
+    :param current_user:
+    :return:
+    """
+    return {
+        **profiler.stats(),
+        "profiles": [profile.summary() for profile in reversed(profiler.profiles)],
+    }
+
+
+@router.get("/profiles/{profile_id}", status_code=HTTPStatus.OK)
+async def get_profile(
+    profile_id: int,
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> dict:
+    """
+    Get a buffered request profile with its SQL statements and sampled stacks
+
+    :param profile_id:
+    :param current_user:
+    :return:
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=f"Profile with id: {profile_id} not found or already evicted",
+        )
+
+    return profile.as_dict()
+
+
+@router.get("/slow-queries", status_code=HTTPStatus.OK)
+async def get_slow_queries(
+    current_user: schema.Principal = Depends(oauth2.get_admin_user),
+) -> list:
+    """
+    Get the slow queries captured with their EXPLAIN ANALYZE plans, newest
+    first
+
+    :param current_user:
+    :return:
+    """
+    return list(reversed(profiler.slow_queries))
@@ -1,11 +1,35 @@
 from http import HTTPStatus
-from typing import List, Annotated, Optional
-
-from fastapi import HTTPException, Depends, APIRouter, Query
-from sqlalchemy.orm import Session
-
-from app import crud, schema, models, oauth2
+from typing import List, Annotated, Literal, Optional, Type
+
+from datetime import datetime
+
+import orjson
+from fastapi import HTTPException, Depends, APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schema, oauth2, pagination
+from app.config import settings
+from app.exporter import ArticleExport
+from app.importer import ArticleImporter, iter_ndjson
+from app.AsyncDatabaseManager import (
+    AsyncDatabaseManager,
+    get_fast_reads,
+    parse_updated_at,
+)
+from app.cache import response_cache, article_tags, slug_map
+from app.conditional import (
+    digest_etag,
+    entity_etag,
+    is_not_modified,
+    not_modified_response,
+    validator_headers,
+)
 from app.database import get_db
+from app.replicas import get_read_db
+from app.viewcount import view_counter
+from app.serialization import json_response, sparse_model, to_json
 
 router = APIRouter(prefix="/articles", tags=["Articles"])
 
@@ -14,28 +38,124 @@ router = APIRouter(prefix="/articles", tags=["Articles"])
 async def get_articles(
     limit: Annotated[int, Query(ge=1)],
     page: Annotated[int, Query(ge=1)],
+    request: Request,
     search: Annotated[str, Query()] = "",
-    db: Session = Depends(get_db),
+    fields: Annotated[
+        Optional[str],
+        Query(
+            description='"summary", or a comma-separated list of article fields'
+            " to return instead of the full article"
+        ),
+    ] = None,
+    db: AsyncSession = Depends(get_read_db),
+    fast_reads: Optional[AsyncDatabaseManager] = Depends(get_fast_reads),
 ) -> List[schema.Article]:
     """
     Get all articles
 
+    :param fields: sparse fieldset; only these columns are selected
     :return:
     """
-    offset = 0 if page == 1 else (limit * page - 1)
+    offset = (page - 1) * limit
+    if fields is not None:
+        item_model = _fieldset_model(fields)
+        articles = await crud.get_articles(
+            db=db, skip=offset, limit=limit, search=search, response_model=item_model
+        )
+
+        return _collection_response(request, List[item_model], articles)
+
+    if fast_reads is not None:
+        payload = (
+            await fast_reads.get_articles_json(skip=offset, limit=limit, search=search)
+        ).encode()
+        headers = validator_headers(digest_etag([payload]))
+        if is_not_modified(request, headers):
+            return not_modified_response(headers)
+
+        return Response(content=payload, media_type="application/json", headers=headers)
+
     try:
-        articles = crud.get_articles(db=db, skip=offset, limit=limit, search=search)
+        articles = await crud.get_articles(
+            db=db, skip=offset, limit=limit, search=search
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    return articles
+    return _collection_response(request, List[schema.Article], articles)
+
+
+@router.get("/feed", status_code=HTTPStatus.OK, response_model=schema.ArticlePage)
+async def get_articles_feed(
+    request: Request,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Annotated[Optional[str], Query()] = None,
+    search: Annotated[str, Query()] = "",
+    db: AsyncSession = Depends(get_read_db),
+) -> schema.ArticlePage:
+    """
+    Get articles newest first, paginated with an opaque cursor
+
+    :param limit:
+    :param cursor: next_cursor of the previous page
+    :param search:
+    :param db:
+    :return:
+    """
+    after = None
+    if cursor:
+        try:
+            after = pagination.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    # Fetch one extra row to learn whether another page exists
+    articles = await crud.get_articles_after(
+        db=db, after=after, limit=limit + 1, search=search
+    )
+
+    next_cursor = None
+    if len(articles) > limit:
+        articles = articles[:limit]
+        next_cursor = pagination.encode_cursor(articles[-1].created_at, articles[-1].id)
+
+    return _collection_response(
+        request, schema.ArticlePage, {"items": articles, "next_cursor": next_cursor}
+    )
+
+
+@router.get(
+    "/search",
+    status_code=HTTPStatus.OK,
+    response_model=List[schema.ArticleSearchResult],
+)
+async def search_articles(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    page: Annotated[int, Query(ge=1)] = 1,
+    db: AsyncSession = Depends(get_read_db),
+) -> List[schema.ArticleSearchResult]:
+    """
+    Search articles by title, keywords and content, best matches first
+
+    :param q: search terms, each matched as a prefix
+    :param limit:
+    :param page:
+    :param db:
+    :return:
+    """
+    hits = await crud.search_articles(
+        db=db, search=q, skip=(page - 1) * limit, limit=limit
+    )
+
+    return json_response(List[schema.ArticleSearchResult], hits)
 
 
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=schema.Article)
 async def create_article(
     payload: schema.ArticleCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
 ) -> schema.Article:
     """
     Create a article
@@ -46,7 +166,7 @@ async def create_article(
     :return:
     """
     payload.author_id = current_user.id
-    new_article = crud.create_article(db, payload)
+    new_article = await crud.create_article(db, payload)
     if not new_article:
         raise HTTPException(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
@@ -56,24 +176,208 @@ async def create_article(
     return new_article
 
 
+@router.post("/bulk", status_code=HTTPStatus.OK, response_model=schema.BulkImportResult)
+async def bulk_import_articles(
+    request: Request,
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
+) -> schema.BulkImportResult:
+    """
+    Create or update many articles at once
+
+    The body is either NDJSON (application/x-ndjson, one article per line,
+    streamed) or a JSON array. Articles are upserted on source_url, else on
+    slug, and the result reports what happened to every input row.
+
+    :param request:
+    :param current_user:
+    :return:
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        documents = iter_ndjson(request.stream())
+    elif content_type == "application/json":
+        try:
+            body = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+        if not isinstance(body, list):
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST, detail="Expected a JSON array"
+            )
+        documents = _aiter(body)
+    else:
+        raise HTTPException(
+            status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            detail="Use application/x-ndjson or application/json",
+        )
+
+    importer = ArticleImporter(
+        author_id=current_user.id, batch_size=settings.bulk_import_batch_size
+    )
+
+    return await importer.run(documents)
+
+
+@router.get("/export", status_code=HTTPStatus.OK, response_class=StreamingResponse)
+async def export_articles(
+    format: Annotated[Literal["ndjson", "csv"], Query()] = "ndjson",
+    category_id: Annotated[Optional[int], Query()] = None,
+    author_id: Annotated[Optional[int], Query()] = None,
+    published: Annotated[Optional[bool], Query()] = None,
+    updated_since: Annotated[Optional[datetime], Query()] = None,
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
+) -> StreamingResponse:
+    """
+    Stream every matching article as NDJSON or CSV
+
+    Published articles plus the caller's own drafts; other authors'
+    unpublished articles are never exported. Pass updated_since to fetch
+    only articles changed since a previous sync.
+
+    :param format: ndjson or csv
+    :param category_id:
+    :param author_id:
+    :param published:
+    :param updated_since:
+    :param current_user:
+    :return:
+    """
+    export = ArticleExport(
+        visible_to=current_user.id,
+        category_id=category_id,
+        author_id=author_id,
+        published=published,
+        updated_since=updated_since,
+    )
+
+    if format == "csv":
+        return StreamingResponse(
+            export.csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="articles.csv"'},
+        )
+
+    return StreamingResponse(export.ndjson(), media_type="application/x-ndjson")
+
+
 @router.get("/latest", status_code=HTTPStatus.OK, response_model=schema.Article)
-async def get_latest_article(db: Session = Depends(get_db)) -> schema.Article:
+async def get_latest_article(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    fast_reads: Optional[AsyncDatabaseManager] = Depends(get_fast_reads),
+) -> schema.Article:
     """
     Get the latest article
 
     :return:
     """
-    article = crud.get_latest_article(db)
 
-    return article
+    async def load():
+        if fast_reads is not None:
+            body = _fast_article_body(await fast_reads.get_latest_article_json())
+            doc = orjson.loads(body)
+            return (
+                body,
+                (
+                    "article:*",
+                    *article_tags(doc["id"], doc["category_id"], doc["author_id"]),
+                ),
+                _article_headers(doc["id"], parse_updated_at(doc)),
+            )
+
+        article = await crud.get_latest_article(db)
+        if not article:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
+            )
+
+        return (
+            to_json(schema.Article, article),
+            (
+                "article:*",
+                *article_tags(article.id, article.category_id, article.author_id),
+            ),
+            _article_headers(article.id, article.updated_at),
+        )
+
+    return await response_cache.respond("articles:latest", load, request=request)
+
+
+@router.get(
+    "/most-viewed",
+    status_code=HTTPStatus.OK,
+    response_model=List[schema.ArticleViews],
+)
+async def get_most_viewed_articles(
+    request: Request,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    db: AsyncSession = Depends(get_read_db),
+) -> List[schema.ArticleViews]:
+    """
+    Get the most viewed articles, counting views not yet flushed to the database
+
+    :param limit:
+    :param db:
+    :return:
+    """
+
+    async def load():
+        articles = await crud.get_most_viewed_articles(
+            db, limit=limit, pending=view_counter.pending
+        )
+        body = to_json(List[schema.ArticleViews], articles)
+
+        return body, ("article:*",), validator_headers(digest_etag([body]))
+
+    # Counts move on every flush, so don't keep the ranking longer than that
+    return await response_cache.respond(
+        f"articles:most-viewed:{limit}",
+        load,
+        ttl=max(1, int(view_counter.interval)),
+        request=request,
+    )
+
+
+@router.get("/by-slug/{slug}", status_code=HTTPStatus.OK, response_model=schema.Article)
+async def get_article_by_slug(
+    slug: str,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    fast_reads: Optional[AsyncDatabaseManager] = Depends(get_fast_reads),
+) -> schema.Article:
+    """
+    Get a article by its slug
+
+    :param slug:
+    :param db:
+    :return:
+    """
+    article_id = slug_map.get(slug)
+    from_map = article_id is not None
+    if article_id is None:
+        article_id = await crud.get_article_id_by_slug(db, slug)
+        if article_id is None:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
+            )
+        slug_map.set(slug, article_id)
+
+    try:
+        return await _article_response(article_id, request, db, fast_reads)
+    except HTTPException as e:
+        # Deleted by another worker since the slug was mapped
+        if from_map and e.status_code == HTTPStatus.NOT_FOUND:
+            slug_map.discard(slug)
+        raise
 
 
 @router.post("/{article_id}", status_code=HTTPStatus.OK, response_model=schema.Article)
 async def update_article(
     article_id: int,
     payload: schema.ArticleUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
 ) -> schema.Article:
     """
     Update a article
@@ -84,8 +388,7 @@ async def update_article(
     :return:
     """
 
-    article_query = db.query(models.Article).filter(models.Article.id == article_id)
-    db_article = article_query.first()
+    db_article = await crud.get_article(db, article_id)
 
     if not db_article:
         raise HTTPException(
@@ -98,13 +401,18 @@ async def update_article(
             detail="You are not authorized to modify this resource!",
         )
 
-    article = crud.update_article(db, db_article, payload)
+    article = await crud.update_article(db, db_article, payload)
 
     return article
 
 
 @router.get("/{article_id}", status_code=HTTPStatus.OK, response_model=schema.Article)
-async def get_article(article_id: int, db: Session = Depends(get_db)) -> schema.Article:
+async def get_article(
+    article_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    fast_reads: Optional[AsyncDatabaseManager] = Depends(get_fast_reads),
+) -> schema.Article:
     """
     Get a article
 
@@ -112,21 +420,14 @@ async def get_article(article_id: int, db: Session = Depends(get_db)) -> schema.
     :param article_id:
     :return:
     """
-    article = crud.get_article(db, article_id)
-
-    if not article:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
-        )
-
-    return article
+    return await _article_response(article_id, request, db, fast_reads)
 
 
 @router.delete("/{article_id}", status_code=HTTPStatus.NO_CONTENT)
 async def delete_article(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
 ):
     """
     Delete a article
@@ -136,7 +437,7 @@ async def delete_article(
     :return:
     """
 
-    article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    article = await crud.get_article(db, article_id)
 
     if not article:
         raise HTTPException(
@@ -149,4 +450,97 @@ async def delete_article(
             detail="You are not authorized to modify this resource!",
         )
 
-    crud.delete_article(db, article_id)
+    await crud.delete_article(db, article_id)
+
+
+async def _article_response(
+    article_id: int,
+    request: Request,
+    db: AsyncSession,
+    fast_reads: Optional[AsyncDatabaseManager],
+) -> Response:
+    async def validate():
+        version = await crud.get_article_version(db, article_id)
+        if not version:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
+            )
+
+        return _article_headers(version.id, version.updated_at)
+
+    async def load():
+        if fast_reads is not None:
+            body = _fast_article_body(await fast_reads.get_article_json(article_id))
+            doc = orjson.loads(body)
+            return (
+                body,
+                article_tags(article_id, doc["category_id"], doc["author_id"]),
+                _article_headers(article_id, parse_updated_at(doc)),
+            )
+
+        article = await crud.get_article(db, article_id)
+        if not article:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
+            )
+
+        return (
+            to_json(schema.Article, article),
+            article_tags(article.id, article.category_id, article.author_id),
+            _article_headers(article.id, article.updated_at),
+        )
+
+    response = await response_cache.respond(
+        f"article:{article_id}", load, request=request, validator=validate
+    )
+    # Counted in memory and flushed in batches; the cached body's view_count
+    # is allowed to lag behind.
+    view_counter.record(article_id)
+
+    return response
+
+
+def _fieldset_model(fields: str) -> Type[BaseModel]:
+    if fields == "summary":
+        return schema.ArticleSummary
+
+    names = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = names - schema.Article.model_fields.keys()
+    if not names or unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            if unknown
+            else "No fields requested",
+        )
+
+    return sparse_model(schema.Article, names | {"id"})
+
+
+def _fast_article_body(payload: Optional[str]) -> bytes:
+    if payload is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="Article not found"
+        )
+
+    return payload.encode()
+
+
+def _article_headers(article_id: int, updated_at: Optional[datetime]) -> dict:
+    return validator_headers(entity_etag("article", article_id, updated_at), updated_at)
+
+
+def _collection_response(request: Request, tp, obj) -> Response:
+    # The ETag digests the body: nested authors and view_count change without
+    # bumping articles.updated_at, so member versions would go stale
+    body = to_json(tp, obj)
+    headers = validator_headers(digest_etag([body]))
+    if is_not_modified(request, headers):
+        return not_modified_response(headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
@@ -2,7 +2,8 @@ from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import schema, crud, utils, models, oauth2
 from app.database import get_db
@@ -13,13 +14,11 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/login", status_code=HTTPStatus.OK)
 async def login(
     user_credentials: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # get user
-    user = (
-        db.query(models.User)
-        .filter(models.User.email == user_credentials.username)
-        .first()
+    user = await db.scalar(
+        select(models.User).filter(models.User.email == user_credentials.username)
     )
 
     if not user:
@@ -27,11 +26,20 @@ async def login(
             status_code=HTTPStatus.NOT_FOUND, detail="Invalid Credentials"
         )
 
-    if not utils.verify_hash(user_credentials.password, user.password):
+    verified, new_hash = await utils.verify_and_update_hash_async(
+        user_credentials.password, user.password
+    )
+    if not verified:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail="Invalid Credentials"
         )
 
-    access_token = oauth2.create_access_token(data={"user_id": user.id})
+    # The stored hash used outdated CryptContext parameters: upgrade it now
+    # that the plain password is at hand
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
+    access_token = oauth2.create_access_token(data=oauth2.token_claims(user))
 
     return {"access_token": access_token, "access_type": "bearer"}
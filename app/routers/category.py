@@ -1,42 +1,93 @@
 from http import HTTPStatus
-from typing import List
+from typing import Annotated, List, Union
 
-from fastapi import Depends, APIRouter
-from sqlalchemy.orm import Session
+from fastapi import Depends, APIRouter, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schema
+from app.cache import response_cache
+from app.conditional import digest_etag, validator_headers
 from app.database import get_db
+from app.replicas import get_read_db
+from app.serialization import to_json
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
-@router.get("/", status_code=HTTPStatus.OK, response_model=List[schema.Category])
-async def get_categories(db: Session = Depends(get_db)) -> List[schema.Category]:
-    categories = crud.get_categories(db)
+@router.get(
+    "/",
+    status_code=HTTPStatus.OK,
+    response_model=Union[List[schema.CategoryWithCount], List[schema.Category]],
+)
+async def get_categories(
+    request: Request,
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    counts: Annotated[bool, Query()] = False,
+    db: AsyncSession = Depends(get_read_db),
+) -> List[schema.Category]:
+    """
+    Get categories, optionally with their published article counts
+
+    :param skip:
+    :param limit:
+    :param counts: include article_count for each category
+    :param db:
+    :return:
+    """
+
+    async def load():
+        categories = await crud.get_categories(
+            db, skip=skip, limit=limit, with_counts=counts
+        )
 
-    return categories
+        item_model = schema.CategoryWithCount if counts else schema.Category
+        body = to_json(List[item_model], categories)
+        # Counts move with every article write
+        tags = ("category:*", "article:*") if counts else ("category:*",)
+
+        return body, tags, validator_headers(digest_etag([body]))
+
+    return await response_cache.respond(
+        f"categories:{skip}:{limit}:{int(counts)}", load, request=request
+    )
 
 
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=schema.Category)
 async def create_category(
-    payload: schema.CategoryCreate, db: Session = Depends(get_db)
+    payload: schema.CategoryCreate, db: AsyncSession = Depends(get_db)
 ) -> schema.Category:
-    category = crud.create_category(db, payload)
+    category = await crud.create_category(db, payload)
 
     return category
 
 
 @router.get("/{category_id}", status_code=HTTPStatus.OK, response_model=schema.Category)
 async def get_category(
-    category_id: int, db: Session = Depends(get_db)
+    category_id: int, db: AsyncSession = Depends(get_read_db)
 ) -> schema.Category:
-    category = crud.get_category(db, category_id)
+    category = await crud.get_category(db, category_id)
+
+    return category
+
+
+@router.get(
+    "/{category_id}/articles",
+    status_code=HTTPStatus.OK,
+    response_model=schema.CategoryWithArticles,
+)
+async def get_category_articles(
+    category_id: int, db: AsyncSession = Depends(get_read_db)
+) -> schema.CategoryWithArticles:
+    category = await crud.get_category(
+        db, category_id, response_model=schema.CategoryWithArticles
+    )
 
     return category
 
 
 @router.delete("/{category_id}", status_code=HTTPStatus.NO_CONTENT)
-async def delete_category(category_id: int, db: Session = Depends(get_db)):
+async def delete_category(category_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a category
 
@@ -45,14 +96,14 @@ async def delete_category(category_id: int, db: Session = Depends(get_db)):
     :return:
     """
 
-    crud.delete_category(db, category_id)
+    await crud.delete_category(db, category_id)
 
 
 @router.post(
     "/{category_id}", status_code=HTTPStatus.OK, response_model=schema.Category
 )
 async def update_category(
-    category_id: int, payload: schema.CategoryUpdate, db: Session = Depends(get_db)
+    category_id: int, payload: schema.CategoryUpdate, db: AsyncSession = Depends(get_db)
 ) -> schema.Category:
     """
     Update a category
@@ -63,6 +114,6 @@ async def update_category(
     :return:
     """
 
-    category = crud.update_category(db, category_id, payload)
+    category = await crud.update_category(db, category_id, payload)
 
     return category
@@ -1,33 +1,100 @@
 from http import HTTPStatus
 from typing import List
 
-from fastapi import Depends, APIRouter
-from sqlalchemy.orm import Session
+from fastapi import Depends, APIRouter, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud, schema
+from app import crud, schema, oauth2
+from app.cache import response_cache
+from app.conditional import digest_etag, validator_headers
 from app.database import get_db
+from app.replicas import get_read_db
+from app.serialization import to_json
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/", status_code=HTTPStatus.OK, response_model=List[schema.User])
-async def get_users(db: Session = Depends(get_db)) -> List[schema.User]:
-    users = crud.get_users(db)
+async def get_users(db: AsyncSession = Depends(get_read_db)) -> List[schema.User]:
+    users = await crud.get_users(db)
 
     return users
 
 
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=schema.User)
 async def create_user(
-    payload: schema.UserCreate, db: Session = Depends(get_db)
+    payload: schema.UserCreate, db: AsyncSession = Depends(get_db)
 ) -> schema.User:
-    user = crud.create_user(db, payload)
+    user = await crud.create_user(db, payload)
 
     return user
 
 
+@router.get("/me", status_code=HTTPStatus.OK, response_model=schema.User)
+async def get_me(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
+) -> schema.User:
+    """
+    Get the authenticated user
+
+    :param request:
+    :param db:
+    :param current_user:
+    :return:
+    """
+    return await get_user(current_user.id, request, db)
+
+
 @router.get("/{user_id}", status_code=HTTPStatus.OK, response_model=schema.User)
-async def get_user(user_id: int, db: Session = Depends(get_db)) -> schema.User:
-    user = crud.get_user(db, user_id)
+async def get_user(
+    user_id: int, request: Request, db: AsyncSession = Depends(get_read_db)
+) -> schema.User:
+    async def load():
+        user = await crud.get_user(db, user_id)
+
+        body = to_json(schema.User, user)
+
+        return body, (f"user:{user_id}",), validator_headers(digest_etag([body]))
+
+    return await response_cache.respond(f"user:{user_id}", load, request=request)
+
+
+@router.get(
+    "/{user_id}/articles",
+    status_code=HTTPStatus.OK,
+    response_model=schema.UserWithArticles,
+)
+async def get_user_articles(
+    user_id: int, db: AsyncSession = Depends(get_read_db)
+) -> schema.UserWithArticles:
+    user = await crud.get_user(db, user_id, response_model=schema.UserWithArticles)
+
+    return user
+
+
+@router.post("/{user_id}", status_code=HTTPStatus.OK, response_model=schema.User)
+async def update_user(
+    user_id: int,
+    payload: schema.UserUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: schema.Principal = Depends(oauth2.get_current_user),
+) -> schema.User:
+    """
+    Update a user
+
+    :param db:
+    :param user_id:
+    :param payload: schemas.UserUpdate
+    :return:
+    """
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="You are not authorized to modify this resource!",
+        )
+
+    user = await crud.update_user(db, user_id, payload)
 
     return user
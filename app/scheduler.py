@@ -0,0 +1,136 @@
+"""
+Publishes articles whose scheduled_at has passed.
+
+Runs inside every app worker (see app.main) unless SCHEDULER_ENABLED is off,
+or standalone:
+
+    python -m app.scheduler
+"""
+import asyncio
+import logging
+import signal
+from typing import List, Optional, Tuple
+
+from app.AsyncDatabaseManager import db_manager
+from app.cache import response_cache, article_tags
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Due rows are claimed with SKIP LOCKED, so concurrent workers (other
+# processes, other nodes) each take a disjoint batch instead of blocking on
+# or double-publishing the same rows. The scan is served by
+# ix_articles_published_scheduled_at.
+_PUBLISH_DUE = """
+    WITH due AS (
+        SELECT id FROM articles
+        WHERE published = false AND scheduled_at <= now()
+        ORDER BY scheduled_at
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE articles AS a
+    SET published = true, updated_at = now()
+    FROM due
+    WHERE a.id = due.id
+    RETURNING a.id, a.category_id, a.author_id
+"""
+
+
+class PublishScheduler:
+    def __init__(self, interval: float, batch_size: int, enabled: bool = True):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.enabled = enabled
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.published = 0
+        self.failed_runs = 0
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run(), name="publish-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.publish_due()
+            except Exception:
+                self.failed_runs += 1
+                logger.exception("Publishing scheduled articles failed")
+            await asyncio.sleep(self.interval)
+
+    async def publish_due(self) -> int:
+        """
+        Publish every due article, one committed batch at a time.
+        """
+        self.runs += 1
+        total = 0
+        while True:
+            rows = await self._publish_batch()
+            total += len(rows)
+            if rows:
+                await response_cache.invalidate(
+                    "article:*", *(tag for row in rows for tag in article_tags(*row))
+                )
+            if len(rows) < self.batch_size:
+                break
+
+        self.published += total
+        return total
+
+    async def _publish_batch(self) -> List[Tuple[int, Optional[int], int]]:
+        async with db_manager.pool.connection() as conn:
+            cur = await conn.execute(_PUBLISH_DUE, {"limit": self.batch_size})
+            return await cur.fetchall()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "published": self.published,
+            "failed_runs": self.failed_runs,
+        }
+
+
+publish_scheduler = PublishScheduler(
+    interval=settings.scheduler_interval,
+    batch_size=settings.scheduler_batch_size,
+    enabled=settings.scheduler_enabled,
+)
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    scheduler = PublishScheduler(
+        interval=settings.scheduler_interval, batch_size=settings.scheduler_batch_size
+    )
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await db_manager.connect()
+    scheduler.start()
+    logger.info("Publishing scheduled articles every %ss", scheduler.interval)
+    try:
+        await stopping.wait()
+    finally:
+        await scheduler.stop()
+        await db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
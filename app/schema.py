@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 
 
 class ArticleBase(BaseModel):
@@ -25,8 +25,12 @@ class CategoryUpdate(CategoryBase):
 class Category(CategoryBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategoryWithCount(Category):
+    # Published articles only
+    article_count: int = 0
 
 
 class CategoryWithArticles(Category):
@@ -44,13 +48,21 @@ class UserCreate(UserBase):
 
 
 class User(UserBase):
+    # Already validated on the way in; running email-validator again on every
+    # serialized author dominated list page serialization time.
+    email: str
     id: int
     username: str
     is_active: bool = True
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None
+    username: Optional[str] = None
+    is_active: Optional[bool] = None
 
 
 class UserWithArticles(User):
@@ -65,8 +77,6 @@ class UserLogin(BaseModel):
 class ArticleCreate(ArticleBase):
     category_id: int
     author_id: int
-    number_of_words: Optional[int] = 0
-    minutes_to_read: Optional[int] = 0
     image: Optional[str] = None
     slug: Optional[str] = None
     keywords: Optional[str] = None
@@ -80,8 +90,6 @@ class ArticleCreate(ArticleBase):
 class ArticleUpdate(ArticleBase):
     category_id: Optional[int] = None
     author_id: Optional[int] = None
-    number_of_words: Optional[int] = 0
-    minutes_to_read: Optional[int] = 0
     image: Optional[str] = None
     slug: Optional[str] = None
     keywords: Optional[str] = None
@@ -94,10 +102,11 @@ class ArticleUpdate(ArticleBase):
 
 class Article(ArticleBase):
     id: int
-    category_id: int
+    category_id: Optional[int] = None
     author_id: int
     number_of_words: Optional[int] = 0
     minutes_to_read: Optional[int] = 0
+    excerpt: Optional[str] = None
     image: Optional[str] = None
     slug: Optional[str] = None
     keywords: Optional[str] = None
@@ -110,12 +119,55 @@ class Article(ArticleBase):
     updated_at: datetime
     author: User
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleSummary(BaseModel):
+    # What index pages render: no content, no nested author
+    id: int
+    title: str
+    slug: Optional[str] = None
+    image: Optional[str] = None
+    minutes_to_read: Optional[int] = 0
+    excerpt: Optional[str] = None
+    published: bool = True
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleViews(ArticleSummary):
+    view_count: int = 0
+
+
+class ArticlePage(BaseModel):
+    items: List[Article]
+    next_cursor: Optional[str] = None
+
+
+class ArticleSearchResult(BaseModel):
+    article: Article
+    rank: float
+    title_highlight: str
+    content_highlight: Optional[str] = None
+
+
+class BulkImportRowResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    errors: Optional[List[str]] = None
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkImportRowResult]
 
 
 class ArticleWithAuthorCategory(Article):
-    category: CategoryBase
+    category: Optional[CategoryBase] = None
     author: UserBase
 
 
@@ -126,3 +178,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: int | None = None
+    is_active: bool | None = None
+
+
+class Principal(BaseModel):
+    id: int
+    is_active: bool = True
@@ -0,0 +1,32 @@
+import re
+
+# Text search configuration used by the generated articles.search_vector column
+SEARCH_CONFIG = "english"
+
+# Weighted document the articles.search_vector column is generated from
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(keywords, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+# Options for ts_headline highlighting of matched terms
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+
+# Queries shorter than this never fall back to the trigram substring match
+TRIGRAM_MIN_LENGTH = 3
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def prefix_tsquery(search: str) -> str:
+    """
+    Turn free text into a to_tsquery() expression where every term is
+    prefix-matched and all terms must match, e.g. "fast api" -> "fast:* & api:*".
+
+    Only word characters survive, so the result is always valid tsquery syntax.
+    Returns an empty string when the input has no searchable terms.
+    """
+    return " & ".join(f"{term}:*" for term in _TERM_RE.findall(search.lower()))
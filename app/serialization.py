@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+
+# Bound for every cache keyed on model classes. sparse_model mints a class
+# per requested fieldset, so clients control how many distinct keys exist;
+# unbounded caches would pin each one (and its compiled adapter) forever.
+MODEL_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def get_adapter(tp: Any) -> TypeAdapter:
+    # Building a TypeAdapter compiles a validator/serializer; do it once per type
+    return TypeAdapter(tp)
+
+
+def to_json(tp: Any, obj: Any) -> bytes:
+    """
+    Validate obj (ORM objects included) as tp and dump it straight to JSON bytes.
+    """
+    adapter = get_adapter(tp)
+
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def json_response(
+    tp: Any, obj: Any, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize obj as tp in a single validate-and-dump pass. Returning this from
+    a route skips FastAPI's response_model re-validation and jsonable_encoder
+    walk, which dominate the cost of large list pages; response_model is then
+    only used for the OpenAPI schema.
+    """
+    return Response(
+        content=to_json(tp, obj), media_type="application/json", headers=headers
+    )
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def sparse_model(model: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """
+    A copy of model keeping only `fields`, for sparse fieldset responses.
+    Field order follows the original model.
+    """
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (field.annotation, field)
+            for name, field in model.model_fields.items()
+            if name in fields
+        },
+    )
@@ -0,0 +1,65 @@
+import re
+import secrets
+import unicodedata
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+MAX_SLUG_LENGTH = 80
+
+# Suffixed candidates probed per round trip before falling back to a random one
+_CANDIDATES = 10
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text: str) -> str:
+    # Transliterate to ASCII where possible ("Café" -> "cafe"), drop the rest
+    ascii_text = (
+        unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    )
+    slug = _NON_ALNUM.sub("-", ascii_text.lower()).strip("-")
+    slug = slug[:MAX_SLUG_LENGTH].rstrip("-")
+
+    return slug or "article"
+
+
+def slug_candidates(title: str, count: int = 1) -> List[str]:
+    """
+    slugify(title) and its -2, -3, ... suffixes: enough for count articles
+    with this title, plus a few already taken ones to skip. The base leaves
+    room for a suffix within MAX_SLUG_LENGTH.
+    """
+    base = slugify(title)[: MAX_SLUG_LENGTH - 8]
+
+    return [base] + [f"{base}-{n}" for n in range(2, count + _CANDIDATES)]
+
+
+def random_slug(base: str) -> str:
+    # When every candidate is taken
+    return f"{base}-{secrets.token_hex(3)}"
+
+
+async def unique_slug(
+    db: AsyncSession, title: str, exclude_id: Optional[int] = None
+) -> str:
+    """
+    slugify(title), suffixed with -2, -3, ... when taken. All candidates are
+    checked in one equality lookup on ux_articles_slug. The unique index
+    remains the arbiter if a concurrent write claims the same slug.
+    """
+    candidates = slug_candidates(title)
+
+    query = select(models.Article.slug).filter(models.Article.slug.in_(candidates))
+    if exclude_id is not None:
+        query = query.filter(models.Article.id != exclude_id)
+    taken = set((await db.scalars(query)).all())
+
+    for candidate in candidates:
+        if candidate not in taken:
+            return candidate
+
+    return random_slug(candidates[0])
@@ -0,0 +1,147 @@
+"""
+Word count, reading time and plain-text excerpt of article content, computed
+by the server on write.
+
+Recompute them for existing rows with:
+
+    python -m app.textstats [--batch-size 500]
+"""
+import argparse
+import asyncio
+import html
+import math
+import re
+from typing import NamedTuple, Optional
+
+from psycopg import sql
+
+from app.AsyncDatabaseManager import db_manager
+from app.cache import response_cache
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 280
+
+# Content longer than this is scanned in a worker thread by text_stats_async
+OFFLOAD_THRESHOLD = 64 * 1024
+
+# Markup is skipped as a whole token so tag names and attributes never count
+# as words or leak into the excerpt. A tag cannot contain "<": otherwise every
+# unclosed "<" (as in "x < y") would rescan to the end of the content.
+_TOKEN = re.compile(r"<[^<>]*>|[^\s<]+")
+
+
+class TextStats(NamedTuple):
+    number_of_words: int
+    minutes_to_read: int
+    excerpt: Optional[str]
+
+
+def text_stats(content: Optional[str]) -> TextStats:
+    """
+    Single pass over content with a regex scanner, so even very large bodies
+    are never split, stripped or copied as a whole; only the words that make
+    it into the excerpt are kept.
+    """
+    if not content:
+        return TextStats(0, 0, None)
+
+    words = 0
+    excerpt = []
+    excerpt_length = -1
+    for match in _TOKEN.finditer(content):
+        if content[match.start()] == "<" and content[match.end() - 1] == ">":
+            continue
+
+        words += 1
+        if excerpt_length < EXCERPT_LENGTH:
+            word = match.group()
+            excerpt.append(word)
+            excerpt_length += len(word) + 1
+
+    text = html.unescape(" ".join(excerpt))
+    if len(text) > EXCERPT_LENGTH or len(excerpt) < words:
+        if len(text) > EXCERPT_LENGTH:
+            text = text[:EXCERPT_LENGTH].rsplit(" ", 1)[0]
+        text += "…"
+
+    return TextStats(
+        number_of_words=words,
+        minutes_to_read=math.ceil(words / WORDS_PER_MINUTE),
+        excerpt=text or None,
+    )
+
+
+async def text_stats_async(content: Optional[str]) -> TextStats:
+    """
+    text_stats for request handlers: large bodies are scanned off the event
+    loop so one big post does not stall every other request on the worker.
+    """
+    if content is None or len(content) <= OFFLOAD_THRESHOLD:
+        return text_stats(content)
+
+    return await asyncio.get_running_loop().run_in_executor(None, text_stats, content)
+
+
+async def backfill(batch_size: int = 500) -> int:
+    """
+    Recompute the stats of every article, batch_size rows per transaction,
+    walking the primary key so each batch is an index range scan. updated_at
+    is left alone: the content itself did not change.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        async with db_manager.pool.connection() as conn:
+            cur = await conn.execute(
+                "SELECT id, content FROM articles WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size),
+            )
+            rows = await cur.fetchall()
+            if not rows:
+                break
+
+            values = sql.SQL(", ").join(
+                sql.SQL("({}, {}, {}, {})").format(
+                    sql.Literal(article_id), *map(sql.Literal, text_stats(content))
+                )
+                for article_id, content in rows
+            )
+            cur = await conn.execute(
+                sql.SQL(
+                    """
+                    UPDATE articles AS a
+                    SET number_of_words = v.number_of_words,
+                        minutes_to_read = v.minutes_to_read,
+                        excerpt = v.excerpt
+                    FROM (VALUES {}) AS v (id, number_of_words, minutes_to_read, excerpt)
+                    WHERE a.id = v.id
+                    AND (a.number_of_words, a.minutes_to_read, a.excerpt)
+                        IS DISTINCT FROM (v.number_of_words, v.minutes_to_read, v.excerpt)
+                    """
+                ).format(values)
+            )
+            updated += cur.rowcount
+            last_id = rows[-1][0]
+
+    if updated:
+        await response_cache.clear()
+
+    return updated
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute article text stats")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    await db_manager.connect()
+    try:
+        updated = await backfill(args.batch_size)
+    finally:
+        await db_manager.disconnect()
+
+    print(f"Updated {updated} articles")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
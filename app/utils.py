@@ -1,5 +1,13 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -10,3 +18,134 @@ def hash_string(password: str) -> str:
 
 def verify_hash(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_hash(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    # Returns a new hash when the stored one uses outdated CryptContext settings
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HashWorkerPool:
+    """
+    Runs password hashing off the event loop. bcrypt spends 100-300 ms of CPU
+    per call, so at most `max_workers` run at once and callers beyond
+    `max_waiting` queued ones are turned away with a 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_waiting: int, kind: str = "thread"):
+        self.max_workers = max_workers
+        self.max_waiting = max_waiting
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            self._start()
+
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.in_flight += 1
+
+        # The slot is held until the job itself is done, not until the caller
+        # stops waiting: a disconnected client cannot cancel a running hash,
+        # and releasing early would let more than max_workers pile up
+        loop = asyncio.get_running_loop()
+        slots = self._slots
+        try:
+            job = self._executor.submit(fn, *args)
+        except BaseException:
+            self._finished(slots, started_at)
+            raise
+
+        def done(_) -> None:
+            try:
+                loop.call_soon_threadsafe(self._finished, slots, started_at)
+            except RuntimeError:
+                pass  # The loop is closed
+
+        job.add_done_callback(done)
+        return await asyncio.wrap_future(job)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._slots = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "max_waiting": self.max_waiting,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 3)
+            if self.completed
+            else 0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_run_ms": round(self.total_run / self.completed * 1000, 3)
+            if self.completed
+            else 0,
+        }
+
+    def _start(self) -> None:
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            # bcrypt releases the GIL while hashing, so threads run in parallel
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    def _finished(self, slots: asyncio.Semaphore, started_at: float) -> None:
+        self.in_flight -= 1
+        self.completed += 1
+        self.total_run += time.perf_counter() - started_at
+        slots.release()
+
+
+hash_pool = HashWorkerPool(
+    max_workers=settings.hash_workers,
+    max_waiting=settings.hash_max_waiting,
+    kind=settings.hash_executor,
+)
+
+
+async def hash_string_async(password: str) -> str:
+    return await hash_pool.run(hash_string, password)
+
+
+async def verify_and_update_hash_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return await hash_pool.run(verify_and_update_hash, plain_password, hashed_password)
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from psycopg import sql
+
+from app.AsyncDatabaseManager import db_manager
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Write-behind aggregator for article views. Reads only bump an in-memory
+    counter; a background task periodically adds the accumulated deltas to
+    articles.view_count with a single multi-row UPDATE, so the read path never
+    takes a row lock.
+
+    Each worker keeps its own deltas and flushes increments, so several
+    workers add up correctly. Views recorded since the last flush are lost if
+    the process dies without a graceful shutdown.
+    """
+
+    def __init__(self, interval: float, enabled: bool = True):
+        self.interval = interval
+        self.enabled = enabled
+        self.pending: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, article_id: int) -> None:
+        if not self.enabled:
+            return
+
+        self.pending[article_id] = self.pending.get(article_id, 0) + 1
+        self.recorded += 1
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(), name="view-count-flush")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Not cancelled: a flush in flight is let finish, since its batch
+            # is no longer in pending
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+        # Graceful shutdown: write out whatever is left
+        await self.flush()
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+
+        # Swap the batch out first so views recorded during the UPDATE land
+        # in the next one
+        batch, self.pending = self.pending, {}
+
+        # Sorted ids keep row lock order consistent across workers
+        values = sql.SQL(", ").join(
+            sql.SQL("({}, {})").format(sql.Literal(article_id), sql.Literal(views))
+            for article_id, views in sorted(batch.items())
+        )
+        query = sql.SQL(
+            """
+            UPDATE articles AS a
+            SET view_count = coalesce(a.view_count, 0) + v.views
+            FROM (VALUES {}) AS v (id, views)
+            WHERE a.id = v.id
+            """
+        ).format(values)
+
+        started_at = time.perf_counter()
+        try:
+            async with db_manager.pool.connection() as conn:
+                cur = await conn.execute(query)
+                updated = cur.rowcount
+        except asyncio.CancelledError:
+            self._restore(batch)
+            raise
+        except Exception:
+            # Put the views back so the next flush retries them
+            self._restore(batch)
+            self.failed_flushes += 1
+            logger.exception("Flushing %d article view counts failed", len(batch))
+            return 0
+
+        self.flushes += 1
+        self.flushed_rows += updated
+        self.last_flush_ms = (time.perf_counter() - started_at) * 1000
+
+        return updated
+
+    def _restore(self, batch: Dict[int, int]) -> None:
+        for article_id, views in batch.items():
+            self.pending[article_id] = self.pending.get(article_id, 0) + views
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "pending_articles": len(self.pending),
+            "pending_views": sum(self.pending.values()),
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+
+view_counter = ViewCounter(
+    interval=settings.view_count_flush_interval, enabled=settings.view_count_enabled
+)
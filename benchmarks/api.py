@@ -0,0 +1,489 @@
+"""
+HTTP benchmark: drives the API in-process (httpx ASGITransport, full
+middleware stack and lifespan) with concurrent clients and reports
+throughput and latency percentiles per scenario as JSON.
+
+    python -m benchmarks.api [--seed-articles 50000 --reset]
+        [--concurrency 16] [--duration 10] [--scenarios list,detail]
+        [--import-batch 500] [--output results.json]
+
+Needs Postgres: the read paths rely on tsvector search, pg_trgm and the
+psycopg pool, so there is no SQLite stand-in. Point DB_* at a scratch
+database. Set CACHE_ENABLED=false to measure the uncached read paths.
+Compare two runs with the same --seed, scale and settings; the report
+records all three plus the git revision.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+from sqlalchemy import func, select
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.main import app
+from benchmarks.seed import PASSWORD, seed
+
+_SEARCH_TERMS = ["postgres", "python", "fastapi", "asyncio", "search", "caching"]
+# Fixed page depths at which offset and cursor pagination are compared
+_PAGE_DEPTHS = (1, 50, 500)
+
+
+@dataclass
+class Context:
+    token: str
+    user_email: str
+    article_ids: List[int]
+    # Articles written by the benchmark user, the only ones it may update
+    own_article_ids: List[int]
+    category_ids: List[int]
+    pages: int
+    import_batch: int = 500
+    # Per worker (keyed by its rng): next feed cursor and pages left to walk
+    feed_walks: Dict[int, Tuple[Optional[str], int]] = field(default_factory=dict)
+    # Page depth -> the feed cursor that fetches it (None for the first page)
+    page_cursors: Dict[int, Optional[str]] = field(default_factory=dict)
+
+    @property
+    def auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+Request = Callable[
+    [httpx.AsyncClient, Context, random.Random], Awaitable[httpx.Response]
+]
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Optional[Request] = None
+    expected_status: int = 200
+    # Rows per request, for throughput in rows/s rather than requests/s
+    rows: Callable[[Context], int] = lambda ctx: 1
+    # Instead of request: labelled requests run side by side, the workers
+    # split evenly between them, each reported on its own as well
+    mix: Optional[Dict[str, Request]] = None
+    # Feed cursors needed up to this page depth, collected before the run
+    page_depth: int = 0
+
+    @property
+    def requests(self) -> Dict[str, Request]:
+        return self.mix or {self.name: self.request}
+
+
+async def _create(client, ctx, rng):
+    response = await client.post(
+        "/articles/",
+        json={
+            "title": f"Benchmark article {rng.getrandbits(48):x}",
+            "content": "Lorem ipsum dolor sit amet. " * rng.randint(20, 200),
+            "category_id": rng.choice(ctx.category_ids),
+            "author_id": 0,
+            "published": True,
+        },
+        headers=ctx.auth,
+    )
+    if response.status_code == 201:
+        ctx.own_article_ids.append(response.json()["id"])
+
+    return response
+
+
+async def _feed(client, ctx, rng):
+    # Each worker walks the cursor feed from the top down to a random depth
+    # in the same range "list" pages through, one page per request
+    cursor, pages_left = ctx.feed_walks.pop(id(rng), (None, rng.randint(1, ctx.pages)))
+    params = {"limit": 20}
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = await client.get("/articles/feed", params=params)
+
+    if response.status_code == 200 and pages_left > 1:
+        next_cursor = response.json()["next_cursor"]
+        if next_cursor is not None:
+            ctx.feed_walks[id(rng)] = (next_cursor, pages_left - 1)
+
+    return response
+
+
+async def _import(client, ctx, rng):
+    body = b"\n".join(
+        orjson.dumps(
+            {
+                "title": f"Imported benchmark article {rng.getrandbits(48):x}",
+                "content": "Lorem ipsum dolor sit amet. " * rng.randint(20, 200),
+                "category_id": rng.choice(ctx.category_ids),
+            }
+        )
+        for _ in range(ctx.import_batch)
+    )
+    return await client.post(
+        "/articles/bulk",
+        content=body,
+        headers={**ctx.auth, "Content-Type": "application/x-ndjson"},
+    )
+
+
+def _page(depth: int) -> Dict[str, Request]:
+    # The same 20 articles, by page number (OFFSET) and by cursor (keyset)
+    def offset(client, ctx, rng):
+        return client.get(
+            "/articles/", params={"limit": 20, "page": min(depth, ctx.pages)}
+        )
+
+    def cursor(client, ctx, rng):
+        params = {"limit": 20}
+        page_cursor = ctx.page_cursors[min(depth, ctx.pages)]
+        if page_cursor is not None:
+            params["cursor"] = page_cursor
+        return client.get("/articles/feed", params=params)
+
+    return {"offset": offset, "cursor": cursor}
+
+
+async def _page_cursors(client: httpx.AsyncClient, pages: int) -> Dict[int, str]:
+    cursors: Dict[int, Optional[str]] = {1: None}
+    for page in range(2, pages + 1):
+        params = {"limit": 20}
+        if cursors[page - 1] is not None:
+            params["cursor"] = cursors[page - 1]
+        response = await client.get("/articles/feed", params=params)
+        response.raise_for_status()
+        next_cursor = response.json()["next_cursor"]
+        if next_cursor is None:
+            break
+        cursors[page] = next_cursor
+
+    return cursors
+
+
+def _detail(client, ctx, rng):
+    return client.get(f"/articles/{rng.choice(ctx.article_ids)}")
+
+
+def _login(client, ctx, rng):
+    return client.post(
+        "/auth/login", data={"username": ctx.user_email, "password": PASSWORD}
+    )
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        "list",
+        lambda c, ctx, rng: c.get(
+            "/articles/", params={"limit": 20, "page": rng.randint(1, ctx.pages)}
+        ),
+    ),
+    Scenario(
+        "search",
+        lambda c, ctx, rng: c.get(
+            "/articles/search", params={"q": rng.choice(_SEARCH_TERMS), "limit": 20}
+        ),
+    ),
+    Scenario("feed", _feed),
+    Scenario("latest", lambda c, ctx, rng: c.get("/articles/latest")),
+    Scenario("detail", _detail),
+    # Per-request authentication cost: /users/me is served from the response
+    # cache, so the bearer token check dominates. Compare runs with
+    # AUTH_CACHE_ENABLED on and off.
+    Scenario("auth_get", lambda c, ctx, rng: c.get("/users/me", headers=ctx.auth)),
+    Scenario("create", _create, expected_status=201),
+    Scenario(
+        "update",
+        lambda c, ctx, rng: c.post(
+            f"/articles/{rng.choice(ctx.own_article_ids)}",
+            json={
+                "title": f"Updated benchmark article {rng.getrandbits(48):x}",
+                "content": "Dolor sit amet. " * rng.randint(20, 200),
+            },
+            headers=ctx.auth,
+        ),
+    ),
+    Scenario("login", _login),
+    # Reads served while bcrypt logins are in flight; compare their latency
+    # with the plain feed and detail scenarios
+    Scenario(
+        "login_mixed",
+        mix={"login": _login, "feed": _feed, "detail": _detail},
+    ),
+    Scenario("import", _import, rows=lambda ctx: ctx.import_batch),
+    # Offset vs cursor pagination at a fixed depth, reported side by side
+    # under by_request (depths beyond the seeded pages are capped)
+    *(
+        Scenario(f"pages_{depth}", mix=_page(depth), page_depth=depth)
+        for depth in _PAGE_DEPTHS
+    ),
+]
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    # Nearest-rank, so p99 of a small run is a real observed latency
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summary(latencies: List[float], elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+    }
+    if ordered:
+        summary["latency_ms"] = {
+            "mean": round(statistics.fmean(ordered), 3),
+            "p50": round(_percentile(ordered, 50), 3),
+            "p95": round(_percentile(ordered, 95), 3),
+            "p99": round(_percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3),
+        }
+
+    return summary
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    scenario: Scenario,
+    concurrency: int,
+    duration: float,
+    seed_value: int,
+) -> dict:
+    requests = scenario.requests
+    labels = list(requests)
+    latencies: Dict[str, List[float]] = {label: [] for label in labels}
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(f"{seed_value}:{scenario.name}:{worker_id}")
+        label = labels[worker_id % len(labels)]
+        request = requests[label]
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            try:
+                response = await request(client, ctx, rng)
+                outcome = response.status_code
+            except Exception as e:
+                outcome = type(e).__name__
+            latencies[label].append((time.perf_counter() - started_at) * 1000)
+            if outcome != scenario.expected_status:
+                key = f"{label}:{outcome}" if scenario.mix else str(outcome)
+                errors[key] = errors.get(key, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    result = {
+        **_summary(
+            [latency for label in labels for latency in latencies[label]], elapsed
+        ),
+        "errors": errors,
+    }
+    rows = scenario.rows(ctx)
+    if rows > 1:
+        result["rows_per_request"] = rows
+        result["throughput_rows_per_s"] = round(result["requests"] * rows / elapsed, 1)
+    if scenario.mix:
+        result["by_request"] = {
+            label: _summary(latencies[label], elapsed) for label in labels
+        }
+
+    return result
+
+
+async def _context(
+    client: httpx.AsyncClient, seed_value: int, import_batch: int
+) -> Context:
+    async with SessionLocal() as db:
+        user_email = await db.scalar(
+            select(models.User.email)
+            .filter(models.User.email.like("user%@example.com"))
+            .order_by(models.User.id)
+            .limit(1)
+        )
+        article_ids = list(
+            (
+                await db.scalars(
+                    select(models.Article.id).filter(models.Article.published)
+                )
+            ).all()
+        )
+        category_ids = list((await db.scalars(select(models.Category.id))).all())
+        own_article_ids = list(
+            (
+                await db.scalars(
+                    select(models.Article.id)
+                    .join(models.User, models.User.id == models.Article.author_id)
+                    .filter(models.User.email == user_email)
+                )
+            ).all()
+        )
+        published = await db.scalar(
+            select(func.count())
+            .select_from(models.Article)
+            .filter(models.Article.published)
+        )
+    if not article_ids or not category_ids or user_email is None:
+        raise SystemExit("Database is empty; pass --seed-articles N (with --reset)")
+
+    response = await client.post(
+        "/auth/login", data={"username": user_email, "password": PASSWORD}
+    )
+    if response.status_code != 200:
+        raise SystemExit(
+            f"Cannot log in as {user_email} with the benchmark password; "
+            "seed with benchmarks.seed"
+        )
+
+    # Sorted before sampling so the same seed picks the same rows run to run
+    article_ids.sort()
+    rng = random.Random(seed_value)
+    return Context(
+        token=response.json()["access_token"],
+        user_email=user_email,
+        article_ids=rng.sample(article_ids, min(len(article_ids), 10_000)),
+        own_article_ids=sorted(own_article_ids),
+        category_ids=sorted(category_ids),
+        pages=max(1, min(published // 20, 500)),
+        import_batch=import_batch,
+    )
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(
+    scenarios: List[Scenario],
+    concurrency: int,
+    duration: float,
+    seed_value: int,
+    import_batch: int = 500,
+) -> dict:
+    report = {
+        "revision": _revision(),
+        "seed": seed_value,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "import_batch": import_batch,
+        "settings": {
+            "cache_enabled": settings.cache_enabled,
+            "cache_url": bool(settings.cache_url),
+            "db_fast_read_path": settings.db_fast_read_path,
+            "compression_enabled": settings.compression_enabled,
+            "metrics_enabled": settings.metrics_enabled,
+            "hash_workers": settings.hash_workers,
+            "auth_cache_enabled": settings.auth_cache_enabled,
+        },
+        "scenarios": {},
+    }
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60
+        ) as client:
+            ctx = await _context(client, seed_value, import_batch)
+            page_depth = max(scenario.page_depth for scenario in scenarios)
+            if page_depth:
+                ctx.page_cursors = await _page_cursors(
+                    client, min(page_depth, ctx.pages)
+                )
+                # The feed may hold fewer pages than the published count says
+                ctx.pages = min(ctx.pages, max(ctx.page_cursors))
+            async with SessionLocal() as db:
+                report["articles"] = await db.scalar(
+                    select(func.count()).select_from(models.Article)
+                )
+
+            for scenario in scenarios:
+                if scenario.name == "update" and not ctx.own_article_ids:
+                    report["scenarios"][scenario.name] = {
+                        "skipped": "benchmark user has no articles; run create first"
+                    }
+                    continue
+                report["scenarios"][scenario.name] = await _run_scenario(
+                    client, ctx, scenario, concurrency, duration, seed_value
+                )
+
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--seed-articles",
+        type=int,
+        default=0,
+        help="seed this many articles (plus users and categories) first",
+    )
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--reset", action="store_true", help="truncate before seeding")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="per scenario")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(scenario.name for scenario in SCENARIOS),
+        help="comma-separated, run in this order",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument(
+        "--import-batch", type=int, default=500, help="rows per import request"
+    )
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    by_name = {scenario.name: scenario for scenario in SCENARIOS}
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    try:
+        if args.seed_articles:
+            await seed(
+                engine,
+                articles=args.seed_articles,
+                users=args.users,
+                categories=args.categories,
+                reset=args.reset,
+            )
+        report = await run(
+            [by_name[name] for name in names],
+            args.concurrency,
+            args.duration,
+            args.seed,
+            args.import_batch,
+        )
+    finally:
+        await engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
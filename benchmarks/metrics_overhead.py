@@ -0,0 +1,128 @@
+"""
+Per-request cost of the metrics instrumentation on GET /articles/{id}.
+
+Alternates rounds with MetricsMiddleware and the engine hooks on and off
+against the same app and article, and fails when the median difference
+exceeds the budget.
+
+    python -m benchmarks.metrics_overhead [--requests 2000] [--rounds 5]
+        [--budget-us 50] [--uncached]
+
+Needs at least one published article (python -m benchmarks.seed). With
+--uncached every request hits the database and round-to-round variance is
+far larger than the overhead itself; raise --rounds before trusting it.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import httpx
+from sqlalchemy import select
+
+from app import metrics, models
+from app.cache import response_cache
+from app.database import SessionLocal, engine
+from app.main import app
+
+# Middleware + contextvar + label lookup + four observations per request,
+# plus two event hooks per ORM query
+OVERHEAD_BUDGET_US = 50.0
+
+
+def _set_metrics(enabled: bool, middleware: list) -> None:
+    app.user_middleware = [
+        m for m in middleware if enabled or m.cls is not metrics.MetricsMiddleware
+    ]
+    app.middleware_stack = app.build_middleware_stack()
+    if enabled:
+        metrics.install(engine)
+    else:
+        metrics.uninstall(engine)
+
+
+async def _time_requests(
+    client: httpx.AsyncClient, path: str, requests: int, uncached: bool
+) -> float:
+    """
+    Mean microseconds per request, issued sequentially so the figure is
+    latency rather than throughput.
+    """
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        if uncached:
+            await response_cache.clear()
+        response = await client.get(path)
+        response.raise_for_status()
+
+    return (time.perf_counter() - started_at) / requests * 1_000_000
+
+
+async def measure(requests: int, rounds: int, uncached: bool) -> dict:
+    async with SessionLocal() as db:
+        article_id = await db.scalar(
+            select(models.Article.id).filter(models.Article.published).limit(1)
+        )
+    if article_id is None:
+        raise SystemExit("No published article; run python -m benchmarks.seed first")
+
+    path = f"/articles/{article_id}"
+    middleware = list(app.user_middleware)
+    if not any(m.cls is metrics.MetricsMiddleware for m in middleware):
+        raise SystemExit("MetricsMiddleware is not installed; set METRICS_ENABLED")
+
+    samples = {"on": [], "off": []}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+            # Warm up caches, pools and code paths before timing anything
+            await _time_requests(c, path, min(requests, 200), uncached)
+            for _ in range(rounds):
+                for state in ("off", "on"):
+                    _set_metrics(state == "on", middleware)
+                    samples[state].append(
+                        await _time_requests(c, path, requests, uncached)
+                    )
+
+    _set_metrics(True, middleware)
+    on, off = statistics.median(samples["on"]), statistics.median(samples["off"])
+
+    return {
+        "path": "/articles/{id}",
+        "cached": not uncached,
+        "requests_per_round": requests,
+        "rounds": rounds,
+        "us_per_request_off": round(off, 1),
+        "us_per_request_on": round(on, 1),
+        "overhead_us": round(on - off, 1),
+        "overhead_pct": round((on - off) / off * 100, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=OVERHEAD_BUDGET_US)
+    parser.add_argument(
+        "--uncached",
+        action="store_true",
+        help="clear the response cache before every request so each one queries",
+    )
+    args = parser.parse_args()
+
+    try:
+        report = await measure(args.requests, args.rounds, args.uncached)
+    finally:
+        await engine.dispose()
+
+    report["budget_us"] = args.budget_us
+    report["ok"] = report["overhead_us"] <= args.budget_us
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""
+Query-plan audit: runs each crud read path against a seeded database, EXPLAINs
+every statement it issued, and fails when a large table is read with a
+sequential scan.
+
+    python -m benchmarks.seed --reset        # scratch database only
+    python -m benchmarks.query_plans [--min-articles 10000]
+
+Prints a JSON report and exits with status 1 on any unexpected seq scan.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, querycount, schema
+from app.database import SessionLocal, engine
+
+# Tables that are big in production; small lookup tables may be seq scanned
+LARGE_TABLES = {"articles", "users"}
+
+
+@dataclass
+class Check:
+    name: str
+    run: Callable[[AsyncSession, dict], Awaitable[object]]
+    # Seq scans that are accepted on purpose, with the reason why
+    allow_seq_scan: Optional[str] = None
+    requires_extension: Optional[str] = None
+
+
+CHECKS: List[Check] = [
+    Check("get_articles", lambda db, s: crud.get_articles(db, skip=0, limit=20)),
+    Check(
+        "get_articles (page 50)",
+        lambda db, s: crud.get_articles(db, skip=980, limit=20),
+    ),
+    Check(
+        "get_articles (summary)",
+        lambda db, s: crud.get_articles(
+            db, limit=20, response_model=schema.ArticleSummary
+        ),
+    ),
+    Check(
+        "get_articles (search)",
+        lambda db, s: crud.get_articles(db, limit=20, search="postgres"),
+    ),
+    Check(
+        "get_articles_after",
+        lambda db, s: crud.get_articles_after(db, after=s["cursor"], limit=20),
+    ),
+    Check(
+        "search_articles (full text)",
+        lambda db, s: crud.search_articles(db, search="fastapi lorem", limit=20),
+    ),
+    Check(
+        "search_articles (trigram)",
+        lambda db, s: crud.search_articles(db, search="rticle 12", limit=20),
+        requires_extension="pg_trgm",
+    ),
+    Check("get_article", lambda db, s: crud.get_article(db, s["article_id"])),
+    Check(
+        "get_article_version",
+        lambda db, s: crud.get_article_version(db, s["article_id"]),
+    ),
+    Check("get_latest_article", lambda db, s: crud.get_latest_article(db)),
+    Check(
+        "get_most_viewed_articles",
+        lambda db, s: crud.get_most_viewed_articles(db, limit=10),
+        allow_seq_scan="view_count is a write-behind counter; the ranking is "
+        "cached and an index would make every flush a non-HOT update",
+    ),
+    Check("get_user", lambda db, s: crud.get_user(db, s["user_id"])),
+    Check(
+        "get_user_by_email", lambda db, s: crud.get_user_by_email(db, s["user_email"])
+    ),
+    Check(
+        "get_user (with articles)",
+        lambda db, s: crud.get_user(
+            db, s["user_id"], response_model=schema.UserWithArticles
+        ),
+    ),
+    Check(
+        "get_category (with articles)",
+        lambda db, s: crud.get_category(
+            db, s["category_id"], response_model=schema.CategoryWithArticles
+        ),
+    ),
+    Check(
+        "get_categories (counts)",
+        lambda db, s: crud.get_categories(db, limit=20, with_counts=True),
+        allow_seq_scan="a page of categories covers a large share of all articles, "
+        "which is cheaper to count in one pass; the result is cached until the "
+        "next article write",
+    ),
+]
+
+
+async def _samples(db: AsyncSession) -> dict:
+    article = (
+        await db.execute(
+            select(models.Article.id, models.Article.created_at)
+            .filter(models.Article.published)
+            .order_by(models.Article.created_at.desc(), models.Article.id.desc())
+            .offset(1000)
+            .limit(1)
+        )
+    ).first()
+    user = (
+        await db.execute(select(models.User.id, models.User.email).limit(1))
+    ).first()
+    category_id = await db.scalar(select(models.Category.id).limit(1))
+
+    return {
+        "cursor": (article.created_at, article.id),
+        "article_id": article.id,
+        "user_id": user.id,
+        "user_email": user.email,
+        "category_id": category_id,
+    }
+
+
+def _seq_scans(plan: dict) -> List[str]:
+    found = []
+    if (
+        plan.get("Node Type") == "Seq Scan"
+        and plan.get("Relation Name") in LARGE_TABLES
+    ):
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+
+    return found
+
+
+def _node_types(plan: dict) -> List[str]:
+    node = plan["Node Type"]
+    if "Index Name" in plan:
+        node += f" ({plan['Index Name']})"
+
+    return [node] + [n for child in plan.get("Plans", []) for n in _node_types(child)]
+
+
+async def audit(min_articles: int) -> dict:
+    querycount.install(engine)
+
+    async with SessionLocal() as db:
+        articles = await db.scalar(select(func.count()).select_from(models.Article))
+        if articles < min_articles:
+            raise SystemExit(
+                f"Only {articles} articles; seed at least {min_articles} first "
+                "(python -m benchmarks.seed) or the planner will rightly prefer seq scans"
+            )
+
+        extensions = set(
+            (await db.scalars(text("SELECT extname FROM pg_extension"))).all()
+        )
+        samples = await _samples(db)
+
+        report = {"articles": articles, "checks": [], "failures": 0}
+        for check in CHECKS:
+            if check.requires_extension and check.requires_extension not in extensions:
+                report["checks"].append(
+                    {
+                        "name": check.name,
+                        "skipped": f"{check.requires_extension} missing",
+                    }
+                )
+                continue
+
+            with querycount.count_queries() as counter:
+                await check.run(db, samples)
+
+            queries = []
+            failed = False
+            for statement, parameters in zip(counter.statements, counter.parameters):
+                if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                    continue
+                conn = await db.connection()
+                plan = (
+                    await conn.exec_driver_sql(
+                        "EXPLAIN (FORMAT JSON) " + statement, parameters
+                    )
+                ).scalar()[0]["Plan"]
+                seq_scans = _seq_scans(plan)
+                failed = failed or (bool(seq_scans) and not check.allow_seq_scan)
+                queries.append(
+                    {
+                        "plan": _node_types(plan),
+                        "seq_scans": seq_scans,
+                        "cost": plan["Total Cost"],
+                    }
+                )
+
+            entry = {"name": check.name, "ok": not failed, "queries": queries}
+            if check.allow_seq_scan:
+                entry["allowed_seq_scan"] = check.allow_seq_scan
+            report["checks"].append(entry)
+            report["failures"] += failed
+
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-articles", type=int, default=10_000)
+    args = parser.parse_args()
+
+    try:
+        report = await audit(args.min_articles)
+    finally:
+        await engine.dispose()
+
+    print(json.dumps(report, indent=2, default=str))
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
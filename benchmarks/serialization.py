@@ -0,0 +1,109 @@
+"""
+Serialization cost of a 100-article list page, without a database.
+
+Compares FastAPI's default response path (response_model validation, then
+jsonable_encoder, then stdlib json or orjson rendering) with
+serialization.json_response, which validates and dumps in one pass.
+
+    python -m benchmarks.serialization [--items 100] [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schema
+from app.serialization import json_response
+
+
+def make_articles(count: int) -> List[models.Article]:
+    now = datetime.now(timezone.utc)
+    author = models.User(
+        id=1, email="author@example.com", username="author", is_active=True
+    )
+    author.created_at = now
+
+    articles = []
+    for i in range(count):
+        article = models.Article(
+            id=i + 1,
+            title=f"Article {i}",
+            content="lorem ipsum dolor sit amet " * 200,
+            published=True,
+            category_id=1,
+            author_id=1,
+            number_of_words=1000,
+            minutes_to_read=5,
+            slug=f"article-{i}",
+            keywords="bench,serialization",
+            view_count=i,
+        )
+        article.created_at = now
+        article.updated_at = now
+        article.author = author
+        articles.append(article)
+
+    return articles
+
+
+async def _default(field, articles, response_class):
+    content = await serialize_response(
+        field=field, response_content=articles, is_coroutine=True
+    )
+    return response_class(content).body
+
+
+def _time(fn, rounds: int) -> dict:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+def run(items: int, rounds: int) -> dict:
+    articles = make_articles(items)
+    field = create_response_field(name="response", type_=List[schema.Article])
+    loop = asyncio.new_event_loop()
+
+    results = {
+        "items": items,
+        "rounds": rounds,
+        "default_json": _time(
+            lambda: loop.run_until_complete(_default(field, articles, JSONResponse)),
+            rounds,
+        ),
+        "default_orjson": _time(
+            lambda: loop.run_until_complete(_default(field, articles, ORJSONResponse)),
+            rounds,
+        ),
+        "json_response": _time(
+            lambda: json_response(List[schema.Article], articles).body, rounds
+        ),
+    }
+    loop.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.items, args.rounds), indent=2))
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.profiling import Profiler
+
+pytestmark = pytest.mark.anyio
+
+ADMIN_PATHS = ["/admin/pool", "/admin/profiles", "/admin/slow-queries"]
+
+
+async def test_admin_routes_require_an_admin(client, auth_headers, monkeypatch):
+    for path in ADMIN_PATHS:
+        assert (await client.get(path)).status_code == 401
+        assert (await client.get(path, headers=auth_headers)).status_code == 403
+
+    monkeypatch.setattr(settings, "admin_user_ids", [1])
+    for path in ADMIN_PATHS:
+        response = await client.get(path, headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+
+async def test_profiler_finish_does_not_wait_for_the_sampler():
+    # With a join, finish would block the loop for up to one interval
+    profiler = Profiler(
+        sample_rate=0.0,
+        token=None,
+        interval_ms=1000.0,
+        buffer_size=10,
+        slow_query_ms=None,
+        explain_ms=None,
+    )
+    profile = profiler.start({"method": "GET", "path": "/"})
+    await asyncio.sleep(0)
+
+    started_at = time.perf_counter()
+    profiler.finish(profile)
+    assert time.perf_counter() - started_at < 0.1
+
+    profile.sampler.join(timeout=2)
+    assert not profile.sampler.is_alive()
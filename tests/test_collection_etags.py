@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("path", ["/articles/?limit=10&page=1", "/articles/feed"])
+async def test_list_etag_changes_with_view_count_and_author(
+    client, auth_headers, db, path
+):
+    response = await client.post(
+        "/articles/",
+        json={"title": "Listed", "content": "body", "category_id": 1, "author_id": 1},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+    etags = [(await client.get(path)).headers["etag"]]
+    for statement in (
+        "UPDATE articles SET view_count = view_count + 1",
+        "UPDATE users SET username = 'renamed'",
+    ):
+        async with db.begin() as conn:
+            await conn.execute(text(statement))
+        response = await client.get(path, headers={"If-None-Match": etags[-1]})
+        assert response.status_code == 200
+        etags.append(response.headers["etag"])
+
+    assert len(set(etags)) == 3
@@ -0,0 +1,42 @@
+import orjson
+import pytest
+
+from tests.conftest import login
+
+pytestmark = pytest.mark.anyio
+
+
+async def _export(client, headers, **params):
+    response = await client.get("/articles/export", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return [orjson.loads(line)["title"] for line in response.content.splitlines()]
+
+
+async def test_export_hides_other_authors_drafts(client, auth_headers):
+    other_headers = await login(client, "other@example.com")
+    for headers, title, published in (
+        (auth_headers, "Own draft", False),
+        (auth_headers, "Own post", True),
+        (other_headers, "Other draft", False),
+        (other_headers, "Other post", True),
+    ):
+        response = await client.post(
+            "/articles/",
+            json={
+                "title": title,
+                "content": "body",
+                "category_id": 1,
+                "author_id": 0,
+                "published": published,
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+    assert await _export(client, auth_headers) == [
+        "Own draft",
+        "Own post",
+        "Other post",
+    ]
+    assert await _export(client, auth_headers, published="false") == ["Own draft"]
+    assert await _export(client, other_headers, author_id=1) == ["Own post"]
@@ -0,0 +1,78 @@
+import re
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from sqlalchemy import text
+
+from app.AsyncDatabaseManager import parse_updated_at
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def test_parse_updated_at_pads_short_fractions():
+    # Python 3.10's fromisoformat rejects 5 digit fractions
+    assert parse_updated_at({"updated_at": "2024-01-02T03:04:01.12345+00:00"}) == (
+        datetime(2024, 1, 2, 3, 4, 1, 123450, tzinfo=timezone.utc)
+    )
+    assert parse_updated_at({"updated_at": "2024-01-02T03:04:01+00:00"}) == (
+        datetime(2024, 1, 2, 3, 4, 1, tzinfo=timezone.utc)
+    )
+    assert parse_updated_at({"updated_at": None}) is None
+
+
+@pytest.fixture
+def fast_reads(monkeypatch):
+    monkeypatch.setattr(settings, "db_fast_read_path", True)
+
+
+async def test_fast_path_renders_six_fractional_digits(
+    client, auth_headers, db, fast_reads
+):
+    response = await client.post(
+        "/articles/",
+        json={
+            "title": "Fractions",
+            "content": "body",
+            "category_id": 1,
+            "author_id": 1,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    # json_build_object would print this as ...:01.12345+00
+    async with db.begin() as conn:
+        await conn.execute(
+            text(
+                "UPDATE articles SET updated_at = '2024-01-02 03:04:01.12345+00', "
+                "created_at = '2024-01-02 03:04:01.12345+00'"
+            )
+        )
+
+    for path in ("/articles/1", "/articles/latest"):
+        response = await client.get(path)
+        assert response.status_code == 200, response.text
+        updated_at = orjson.loads(response.content)["updated_at"]
+        assert re.fullmatch(r"2024-01-02T03:04:01\.123450\+00:00", updated_at)
+        assert response.headers["last-modified"] == "Tue, 02 Jan 2024 03:04:01 GMT"
+
+
+@pytest.mark.parametrize("fast_read_path", [False, True])
+async def test_latest_breaks_created_at_ties_by_id(
+    client, auth_headers, db, monkeypatch, fast_read_path
+):
+    monkeypatch.setattr(settings, "db_fast_read_path", fast_read_path)
+    for title in ("First", "Second", "Third"):
+        response = await client.post(
+            "/articles/",
+            json={"title": title, "content": "body", "category_id": 1, "author_id": 1},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+    async with db.begin() as conn:
+        await conn.execute(text("UPDATE articles SET created_at = '2024-01-02'"))
+
+    response = await client.get("/articles/latest")
+    assert response.status_code == 200, response.text
+    assert orjson.loads(response.content)["id"] == 3
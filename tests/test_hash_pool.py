@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utils import HashWorkerPool
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cancelled_caller_keeps_its_slot_until_the_job_ends():
+    pool = HashWorkerPool(max_workers=1, max_waiting=10)
+    release = threading.Event()
+    try:
+        first = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        # The job is still hashing, so the only slot is still taken
+        second = asyncio.create_task(pool.run(lambda: "done"))
+        await asyncio.sleep(0.05)
+        assert pool.in_flight == 1 and pool.waiting == 1
+        assert not second.done()
+
+        release.set()
+        assert await asyncio.wait_for(second, timeout=2) == "done"
+        assert pool.in_flight == 0 and pool.completed == 2
+    finally:
+        release.set()
+        pool.shutdown()
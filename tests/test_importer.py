@@ -0,0 +1,70 @@
+import orjson
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.anyio
+
+
+async def _import(client, headers, documents):
+    response = await client.post(
+        "/articles/bulk",
+        content=b"\n".join(orjson.dumps(document) for document in documents),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+
+
+async def _slugs(db):
+    async with db.connect() as conn:
+        return (await conn.scalars(text("SELECT slug FROM articles ORDER BY id"))).all()
+
+
+async def test_imported_rows_get_unique_slugs(client, auth_headers, db):
+    response = await client.post(
+        "/articles/",
+        json={"title": "Hello World", "category_id": 1, "author_id": 1},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+    await _import(
+        client,
+        auth_headers,
+        [
+            {"title": "Hello World", "category_id": 1},
+            {"title": "hello, world!", "category_id": 1},
+            {"title": "Hello World", "category_id": 1, "source_url": "https://a/1"},
+            {"title": "Other", "category_id": 1, "slug": "hello-world-3"},
+        ],
+    )
+
+    assert await _slugs(db) == [
+        "hello-world",
+        "hello-world-2",
+        "hello-world-4",
+        "hello-world-5",
+        "hello-world-3",
+    ]
+
+
+async def test_reimport_without_slug_keeps_the_slug(client, auth_headers, db):
+    document = {"title": "Synced", "category_id": 1, "source_url": "https://a/1"}
+    await _import(client, auth_headers, [document])
+    await _import(client, auth_headers, [{**document, "title": "Synced again"}])
+
+    assert await _slugs(db) == ["synced"]
+
+
+async def test_slug_keyed_update_keeps_the_source_url(client, auth_headers, db):
+    document = {"title": "Synced", "category_id": 1, "source_url": "https://a/1"}
+    await _import(client, auth_headers, [document])
+    await _import(
+        client, auth_headers, [{"title": "By slug", "category_id": 1, "slug": "synced"}]
+    )
+    await _import(client, auth_headers, [{**document, "title": "By source"}])
+
+    async with db.connect() as conn:
+        rows = (
+            await conn.execute(text("SELECT title, slug, source_url FROM articles"))
+        ).all()
+    assert [tuple(row) for row in rows] == [("By source", "synced", "https://a/1")]
@@ -0,0 +1,21 @@
+from itertools import combinations
+from typing import List
+
+from app import models, schema
+from app.loading import eager_options, projection_options
+from app.serialization import MODEL_CACHE_SIZE, get_adapter, sparse_model
+
+
+def test_sparse_fieldsets_do_not_grow_caches_without_bound():
+    names = sorted(schema.Article.model_fields.keys() - {"id"})
+    fieldsets = [frozenset({"id", *others}) for others in combinations(names, 3)]
+    assert len(fieldsets) > MODEL_CACHE_SIZE
+
+    for fields in fieldsets:
+        model = sparse_model(schema.Article, fields)
+        get_adapter(List[model])
+        projection_options(models.Article, model, ("updated_at",))
+
+    for cache in (sparse_model, get_adapter, eager_options, projection_options):
+        assert cache.cache_info().maxsize == MODEL_CACHE_SIZE
+        assert cache.cache_info().currsize <= MODEL_CACHE_SIZE
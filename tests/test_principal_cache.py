@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from app.cache import PrincipalCache
+from app.schema import Principal
+
+pytestmark = pytest.mark.anyio
+
+
+class SharedStore:
+    """The slice of the redis.asyncio API PrincipalCache uses."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        value = self.values.get(key)
+        return None if value is None else str(value).encode()
+
+    async def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+async def _cache(cache: PrincipalCache, token: str, principal: Principal) -> None:
+    epoch = await cache.epoch(principal.id)
+    cache.set(token, principal, token_expires_at=time.time() + 600, epoch=epoch)
+
+
+async def test_invalidation_reaches_other_workers():
+    store = SharedStore()
+    workers = [PrincipalCache(ttl=60, max_entries=10, client=store) for _ in range(2)]
+    principal = Principal(id=1)
+    for worker in workers:
+        await _cache(worker, "token", principal)
+        assert await worker.get("token") == principal
+
+    await workers[0].invalidate_user(1)
+
+    for worker in workers:
+        assert await worker.get("token") is None
+    assert workers[1].revoked == 1
+
+    # Cached again under the new epoch
+    await _cache(workers[1], "token", principal)
+    assert await workers[1].get("token") == principal
+
+
+async def test_without_a_shared_client_invalidation_is_local():
+    cache = PrincipalCache(ttl=60, max_entries=10)
+    await _cache(cache, "token", Principal(id=1))
+
+    await cache.invalidate_user(1)
+    assert await cache.get("token") is None
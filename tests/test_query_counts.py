@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import text
+
+from app import querycount
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def orm_reads(monkeypatch, database):
+    monkeypatch.setattr(settings, "db_fast_read_path", False)
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    querycount.install(database)
+
+
+async def _add_articles(db, count: int) -> None:
+    async with db.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO articles (title, content, published, category_id,"
+                " author_id, number_of_words, minutes_to_read, view_count)"
+                " SELECT 'Article ' || n, 'body', true, 1, 1, 1, 1, 0"
+                " FROM generate_series(1, :count) AS n"
+            ),
+            {"count": count},
+        )
+
+
+async def _queries(client, path: str, **params) -> int:
+    with querycount.count_queries() as counter:
+        response = await client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    assert counter.count > 0
+
+    return counter.count
+
+
+async def test_article_list_queries_do_not_grow_with_limit(
+    client, auth_headers, db, orm_reads
+):
+    await _add_articles(db, 50)
+
+    one = await _queries(client, "/articles/", limit=1, page=1)
+    fifty = await _queries(client, "/articles/", limit=50, page=1)
+    assert one == fifty
+
+
+@pytest.mark.parametrize("path", ["/categories/1/articles", "/users/1/articles"])
+async def test_nested_article_queries_do_not_grow_with_articles(
+    client, auth_headers, db, orm_reads, path
+):
+    await _add_articles(db, 1)
+    one = await _queries(client, path)
+
+    await _add_articles(db, 49)
+    fifty = await _queries(client, path)
+    assert one == fifty
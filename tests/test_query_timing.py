@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app import metrics, profiling
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def timed(database, monkeypatch):
+    timings = []
+    monkeypatch.setattr(
+        profiling.profiler,
+        "query_finished",
+        lambda statement, parameters, elapsed: timings.append(elapsed),
+    )
+    stats = metrics._RequestStats()
+    token = metrics._request_stats.set(stats)
+    metrics.install(database)
+    profiling.install(database)
+    yield timings, stats
+
+    metrics.uninstall(database)
+    profiling.uninstall(database)
+    metrics._request_stats.reset(token)
+
+
+async def test_failed_statement_does_not_skew_the_next_timing(database, timed):
+    timings, stats = timed
+    async with database.connect() as conn:
+        with pytest.raises(DBAPIError):
+            await conn.execute(text("SELECT 1 / 0"))
+        await conn.rollback()
+        await asyncio.sleep(0.3)
+        await conn.execute(text("SELECT 1"))
+        assert not conn.sync_connection.info
+
+    assert len(timings) == 1 and timings[0] < 0.3
+    assert stats.queries == 1 and stats.db_seconds < 0.3
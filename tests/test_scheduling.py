@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from sqlalchemy import text
+
+from app.scheduler import publish_scheduler
+
+pytestmark = pytest.mark.anyio
+
+
+def _in(**delta) -> str:
+    return (datetime.now(timezone.utc) + timedelta(**delta)).isoformat()
+
+
+async def test_unpublished_article_is_not_republished(client, auth_headers, db):
+    response = await client.post(
+        "/articles/",
+        json={
+            "title": "Scheduled",
+            "content": "body",
+            "category_id": 1,
+            "author_id": 1,
+            "scheduled_at": _in(hours=1),
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    assert response.json()["published"] is False
+
+    async with db.begin() as conn:
+        await conn.execute(
+            text("UPDATE articles SET scheduled_at = now() - interval '1 minute'")
+        )
+    assert await publish_scheduler.publish_due() == 1
+
+    response = await client.post(
+        "/articles/1",
+        json={"title": "Scheduled", "published": False},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["scheduled_at"] is None
+
+    assert await publish_scheduler.publish_due() == 0
+    async with db.connect() as conn:
+        assert await conn.scalar(text("SELECT published FROM articles")) is False
+
+
+async def test_bulk_import_holds_future_schedules(client, auth_headers, db):
+    documents = [
+        {
+            "title": "Later",
+            "content": "body",
+            "category_id": 1,
+            "published": True,
+            "scheduled_at": _in(hours=1),
+        },
+        {
+            "title": "Draft",
+            "content": "body",
+            "category_id": 1,
+            "published": False,
+            "scheduled_at": _in(hours=-1),
+        },
+    ]
+    response = await client.post(
+        "/articles/bulk",
+        content=b"\n".join(orjson.dumps(document) for document in documents),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+
+    async with db.connect() as conn:
+        rows = (
+            await conn.execute(
+                text("SELECT title, published, scheduled_at FROM articles ORDER BY id")
+            )
+        ).all()
+    assert rows[0].title == "Later" and rows[0].published is False
+    assert rows[0].scheduled_at is not None
+    assert rows[1].title == "Draft" and rows[1].published is False
+    assert rows[1].scheduled_at is None
+    assert await publish_scheduler.publish_due() == 0
@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+from app.textstats import OFFLOAD_THRESHOLD, text_stats, text_stats_async
+
+
+def test_markup_is_not_counted():
+    stats = text_stats("<p class='lead'>Hello <b>big</b> world</p>")
+
+    assert stats.number_of_words == 3
+    assert stats.excerpt == "Hello big world"
+
+
+def test_unclosed_angle_brackets_are_linear():
+    # Every "<" used to rescan to the end of the content: ~7.6s at this size
+    content = "x < y " * 32_000
+
+    started_at = time.perf_counter()
+    stats = text_stats(content)
+
+    assert time.perf_counter() - started_at < 1.0
+    assert stats.number_of_words == 64_000
+
+
+@pytest.mark.anyio
+async def test_large_content_is_offloaded():
+    content = "word " * (OFFLOAD_THRESHOLD // 5 + 1)
+
+    assert await text_stats_async(content) == text_stats(content)
@@ -0,0 +1,11 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_me_returns_the_authenticated_user(client, auth_headers):
+    assert (await client.get("/users/me")).status_code == 401
+
+    response = await client.get("/users/me", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == "author@example.com"
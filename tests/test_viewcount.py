@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.viewcount import ViewCounter
+
+pytestmark = pytest.mark.anyio
+
+
+async def _view_count(db) -> int:
+    async with db.connect() as conn:
+        return await conn.scalar(text("SELECT view_count FROM articles WHERE id = 1"))
+
+
+@pytest.fixture
+async def article(client, auth_headers, db):
+    response = await client.post(
+        "/articles/",
+        json={"title": "Viewed", "content": "body", "category_id": 1, "author_id": 1},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+
+async def test_stop_waits_for_the_flush_in_flight(db, article):
+    counter = ViewCounter(interval=0.01)
+    for _ in range(3):
+        counter.record(1)
+
+    # The row lock holds the background flush mid-UPDATE while stop() runs
+    async with db.connect() as locker:
+        await locker.execute(text("SELECT 1 FROM articles WHERE id = 1 FOR UPDATE"))
+        counter.start()
+        while counter.pending:
+            await asyncio.sleep(0.01)
+        counter.record(1)
+        stopping = asyncio.create_task(counter.stop())
+        await asyncio.sleep(0.1)
+        await locker.rollback()
+
+    await stopping
+    assert await _view_count(db) == 4
+    assert counter.pending == {}
+
+
+async def test_cancelled_flush_keeps_its_views(db, article):
+    counter = ViewCounter(interval=60)
+    counter.record(1)
+
+    async with db.connect() as locker:
+        await locker.execute(text("SELECT 1 FROM articles WHERE id = 1 FOR UPDATE"))
+        flush = asyncio.create_task(counter.flush())
+        await asyncio.sleep(0.1)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        await locker.rollback()
+
+    assert counter.pending == {1: 1}
+    assert await counter.flush() == 1
+    assert await _view_count(db) == 1